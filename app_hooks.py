@@ -1,8 +1,63 @@
 import shutil
 import os
+import pandas
+
+# Sessions get shallow copies of the frames shared through BaseModel's registry, copy on write keeps their changes private.
+# Set when the hooks load, before the pre-fork warm up and any session builds frames
+pandas.set_option('mode.copy_on_write', True)
+
+
+def set_paths():
+	root = '//'.join(__file__.replace('\\', '//').split('//')[0:-1]) + '//'
+	os.environ['PATH_ROOT'] = root
+	os.environ['PATH_CACHE'] = root + 'cache//'
+
+
+def warm_up() -> None:
+	"""Imports all panel modules and fetches session independent data sets into the shared data set registry,
+	so that workers forked afterwards start with both already in memory.
+	The data sets are pinned in BaseModel.pinned_data_sets until release_warm_data_sets.
+	"""
+	# Importing the panels loads pandas, numpy and Bokeh models once for all workers
+	from .panels.base import BaseModel
+	from .panels import company_financials, earnings_calendar, portfolio
+
+	# Hooks are loaded twice, by the lifecycle and the request handler, one warm up is enough
+	if BaseModel.pinned_data_sets:
+		return
+
+	set_paths()
+	os.makedirs(os.getenv('PATH_CACHE'), exist_ok=True)
+	model = BaseModel(logger_name=__name__)
+	BaseModel.pinned_data_sets = [
+		getattr(model, _fetch)() for _fetch in [
+		'fetch_portfolio_overview',
+		'fetch_available_symbols_company_financials',
+		'fetch_available_index_constituents',
+		'fetch_index_constituents',
+		'fetch_earnings_calendar',
+		]
+	]
+
+	# Workers must not share the parent's DB connections
+	BaseModel.dispose_engine()
+
+
+def release_warm_data_sets() -> None:
+	"""Unpins warmed data sets, their registry entries are dropped once no session holds a copy."""
+	from .panels.base import BaseModel
+	BaseModel.pinned_data_sets = []
+
+
+# Pre-fork mode, hooks are loaded in the parent before `bokeh serve --num-procs` forks the workers
+if os.getenv('PREFORK_WARMUP'):
+	warm_up()
 
 
 def on_session_created(session_context):
+	# New sessions start from fresh data, as they did when the cache below was their only one
+	from .panels.base import BaseModel
+	BaseModel.expire_shared_data_sets()
 	shutil.rmtree(os.getenv('PATH_CACHE'), ignore_errors=True)
 	os.makedirs(os.getenv('PATH_CACHE'), exist_ok=True)
 
@@ -11,7 +66,20 @@ def on_session_destroyed(session_context):
 	shutil.rmtree(os.getenv('PATH_CACHE'), ignore_errors=True)
 
 
-def on_server_loaded(session_context):
-	root = '//'.join(__file__.replace('\\', '//').split('//')[0:-1]) + '//'
-	os.environ['PATH_ROOT'] = root
-	os.environ['PATH_CACHE'] = root + 'cache//'
+def on_server_loaded(server_context):
+	set_paths()
+
+	# Runs in every forked worker. Warmed data sets are only served until they expire, unpinned afterwards
+	# they do not stay in memory until the next restart
+	if os.getenv('PREFORK_WARMUP'):
+		from tornado.ioloop import IOLoop
+		from .panels.base import BaseModel
+		IOLoop.current().call_later(BaseModel.shared_data_set_ttl, release_warm_data_sets)
+
+	from .panels.memory import MemoryAccounting
+	MemoryAccounting.shared().start()
+
+	# Local admin endpoints reporting memory and patch payload per session and panel
+	if os.getenv('ADMIN_PORT'):
+		from .panels.admin import start_admin_server
+		start_admin_server(port=int(os.getenv('ADMIN_PORT')), address=os.getenv('ADMIN_ADDRESS', '127.0.0.1'))
@@ -0,0 +1,29 @@
+"""
+Helpers driving dashboard sessions through bokeh.client.
+"""
+from typing import Any, Dict
+
+from bokeh.client import ClientSession
+from bokeh.core.serialization import Serializable, Serializer
+from bokeh.document.events import MessageSentEvent
+from bokeh.model import Model
+
+
+class ClientEvent(Serializable):
+	"""
+	UI event in the form the browser sends it, e.g. a button click. bokeh.client has no API
+	to trigger model events on the server, so they are sent as a document message.
+	"""
+
+	def __init__(self, name: str, model: Model) -> None:
+		self.name = name
+		self.model = model
+
+	def to_serializable(self, serializer: Serializer) -> Dict[str, Any]:
+		return {'type': 'event', 'name': self.name, 'values': serializer.encode({'model': self.model})}
+
+	def send(self, session: ClientSession) -> None:
+		session.document.callbacks.trigger_on_change(
+			MessageSentEvent(session.document, 'bokeh_event', self)
+		)
+		session.force_roundtrip()
@@ -0,0 +1,208 @@
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import types
+import urllib.parse
+import urllib.request
+from typing import Any, Callable, Dict, List
+
+# Root of the app directory, the one passed to `bokeh serve`
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app_package(name: str = 'dashboard') -> types.ModuleType:
+	"""Imports the app directory as a package under a fixed name, as the checkout directory name
+	is not necessarily a valid module name. Relative imports inside the app resolve against it.
+
+	Args:
+		name (str, optional): Module name to register the app package under. Defaults to 'dashboard'.
+
+	Returns:
+		types.ModuleType: App package
+	"""
+	if name in sys.modules:
+		return sys.modules[name]
+
+	spec = importlib.util.spec_from_file_location(
+		name,
+		os.path.join(APP_ROOT, '__init__.py'),
+		submodule_search_locations=[APP_ROOT],
+	)
+	package = importlib.util.module_from_spec(spec)
+	sys.modules[name] = package
+	spec.loader.exec_module(package)
+	return package
+
+
+# Path the benchmark server mounts the app on
+APP_PATH = '/dashboard'
+
+
+def free_port() -> int:
+	with socket.socket() as _socket:
+		_socket.bind(('localhost', 0))
+		return _socket.getsockname()[1]
+
+
+def start_server(
+	stand_in_directory: str,
+	port: int,
+	env: Dict[str, str] = None,
+	log_file: str = os.devnull,
+	timeout: float = 60,
+) -> subprocess.Popen:
+	"""Starts benchmarks/server.py in a fresh process and waits until it answers.
+
+	Args:
+		stand_in_directory (str): Directory of the stand-in database
+		port (int): Port to serve on
+		env (Dict[str, str], optional): Additional environment variables of the server. Defaults to None.
+		log_file (str, optional): File receiving the server's output. Defaults to os.devnull.
+		timeout (float, optional): Seconds to wait for the server. Defaults to 60.
+
+	Returns:
+		subprocess.Popen: Server process, to be terminated by the caller
+	"""
+	with open(log_file, 'a') as _log:
+		process = subprocess.Popen(
+			[sys.executable, os.path.join(APP_ROOT, 'benchmarks', 'server.py'), '--stand-in', stand_in_directory, '--port', str(port)],
+			env={**os.environ, **(env or {})},
+			stdout=_log,
+			stderr=subprocess.STDOUT,
+		)
+	deadline = time.monotonic() + timeout
+	while True:
+		try:
+			server_stats(port=port)
+			return process
+		except OSError:
+			if process.poll() is not None or time.monotonic() > deadline:
+				process.kill()
+				raise RuntimeError(f'Benchmark server did not start on port {port}')
+			time.sleep(0.1)
+
+
+def server_stats(port: int, session_id: str = None, reset: bool = False) -> Dict[str, Any]:
+	"""Gets counters of the benchmark server.
+
+	Args:
+		port (int): Port of the server
+		session_id (str, optional): Only report timings of this session. Defaults to None, reporting all.
+		reset (bool, optional): Restart event loop lag sampling and payload totals after reading. Defaults to False.
+
+	Returns:
+		Dict[str, Any]:
+	"""
+	query = urllib.parse.urlencode({
+		**({'session': session_id} if session_id else {}),
+		**({'reset': 1} if reset else {}),
+	})
+	with urllib.request.urlopen(f'http://localhost:{port}/benchmark/stats?{query}') as response:
+		return json.loads(response.read())
+
+
+def wait_until_settled(
+	port: int,
+	session_id: str,
+	quiet: float,
+	timeout: float,
+	since: float = 0,
+	poll: float = None,
+) -> Dict[str, Any]:
+	"""Polls the benchmark server until the session's document did not change for quiet seconds.
+	The Bokeh client drops document patches while it waits for a reply, so this is judged on the server.
+
+	Args:
+		port (int): Port of the server
+		session_id (str): Session to wait for
+		quiet (float): Seconds without changes after which the session counts as settled
+		timeout (float): Seconds to wait at most
+		since (float, optional): Wall clock time of the action waited for, quiet counts from no earlier. Defaults to 0.
+		poll (float, optional): Seconds between polls. Defaults to a tenth of quiet, at most 0.05.
+
+	Returns:
+		Dict[str, Any]: Server stats at that point, with the session's last_change as wall clock time
+	"""
+	deadline = time.time() + timeout
+	while True:
+		stats = server_stats(port=port, session_id=session_id)
+		last_change = stats['sessions'][session_id]['last_change']
+		if time.time() - max(last_change, since) >= quiet:
+			stats['last_change'] = last_change
+			return stats
+		if time.time() > deadline:
+			raise TimeoutError(f'Session did not settle within {timeout} s')
+		time.sleep(poll if poll is not None else min(quiet / 10, 0.05))
+
+
+def percentiles(samples: List[float], points: List[int] = [50, 90, 95, 99]) -> Dict[str, float]:
+	"""Summarizes samples by their percentiles, plus min, max and count."""
+	import numpy
+	if not samples:
+		return {'count': 0}
+	values = numpy.asarray(samples, dtype=float)
+	summary = {f'p{_point}': float(numpy.percentile(values, _point)) for _point in points}
+	return {'count': len(values), 'min': float(values.min()), **summary, 'max': float(values.max())}
+
+
+def environment() -> Dict[str, str]:
+	"""Describes what the results were measured on, so they can be compared across commits."""
+	import bokeh
+	import pandas
+	try:
+		commit = subprocess.run(
+			['git', 'rev-parse', 'HEAD'],
+			cwd=APP_ROOT,
+			capture_output=True,
+			text=True,
+			check=True,
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		commit = None
+	return {
+		'commit': commit,
+		'python': platform.python_version(),
+		'bokeh': bokeh.__version__,
+		'pandas': pandas.__version__,
+		'platform': platform.platform(),
+		'cpu_count': os.cpu_count(),
+	}
+
+
+def write_results(results: Dict[str, Any], name: str, output: str = None) -> str:
+	"""Writes results as JSON, by default to benchmarks/results/<name>-<commit>.json.
+
+	Returns:
+		str: Path written
+	"""
+	results = {'benchmark': name, 'environment': environment(), **results}
+	if output is None:
+		commit = (results['environment']['commit'] or 'unknown')[:10]
+		output = os.path.join(APP_ROOT, 'benchmarks', 'results', f'{name}-{commit}.json')
+	os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+	with open(output, 'w') as _file:
+		json.dump(results, _file, indent=2)
+	return output
+
+
+def measure(function: Callable[[], Any], repeat: int, warmup: int = 1, setup: Callable[[], Any] = None) -> List[float]:
+	"""Times repeated calls of function with perf_counter, setup runs untimed before every call.
+
+	Returns:
+		List[float]: Seconds per call
+	"""
+	samples = []
+	for _run in range(warmup + repeat):
+		if setup is not None:
+			setup()
+		start = time.perf_counter()
+		function()
+		elapsed = time.perf_counter() - start
+		if _run >= warmup:
+			samples.append(elapsed)
+	return samples
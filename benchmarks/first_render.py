@@ -0,0 +1,147 @@
+"""
+Measures how long a new session takes to become interactive, against a local stand-in database.
+
+A session counts as ready once its document on the server stopped changing for the quiet period,
+which includes the data fetched in the background after the document was pulled.
+Every other tab is then activated once to time the construction of its panel.
+Server and client run on the same host, so their wall clocks are compared directly.
+
+Scenarios:
+	cold: first session of a freshly started server, nothing fetched yet
+	warm: following sessions on the same server, shared data sets are already in memory
+	prefork: first session of a server started with PREFORK_WARMUP
+
+Usage:
+	python benchmarks/first_render.py [--servers 3] [--sessions 5] [--output results.json]
+"""
+import argparse
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bokeh.client import pull_session
+
+from common import APP_PATH, free_port, percentiles, server_stats, start_server, wait_until_settled, write_results
+import stand_in
+
+
+def measure_session(port: int, quiet: float, timeout: float) -> Dict[str, Any]:
+	"""Opens one session, waits until it is ready and activates every other tab once.
+
+	Returns:
+		Dict[str, Any]: Timings in seconds and SQL statements executed per step
+	"""
+	statements = server_stats(port=port)['sql_statements']
+	start = time.time()
+	session = pull_session(url=f'http://localhost:{port}{APP_PATH}')
+	pulled = time.time()
+	stats = wait_until_settled(port=port, session_id=session.id, quiet=quiet, timeout=timeout)
+
+	tabs = session.document.roots[0]
+	result = {
+		'pull_seconds': pulled - start,
+		'document_ready_seconds': max(stats['last_change'], pulled) - start,
+		'sql_statements': stats['sql_statements'] - statements,
+		'initial_panel': tabs.tabs[tabs.active].title,
+		'panels': {},
+	}
+
+	for index in [_index for _index in range(len(tabs.tabs)) if _index != tabs.active]:
+		title = tabs.tabs[index].title
+		statements = server_stats(port=port)['sql_statements']
+		start = time.time()
+		tabs.active = index
+		# Sends the change, patches coming back are dropped by the client and not needed here
+		session.force_roundtrip()
+		stats = wait_until_settled(port=port, session_id=session.id, quiet=quiet, timeout=timeout, since=start)
+		result['panels'][title] = {
+			'construction_seconds': stats['last_change'] - start,
+			'sql_statements': stats['sql_statements'] - statements,
+		}
+
+	session.close()
+	return result
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+	summary = {
+		'document_ready_seconds': percentiles([_s['document_ready_seconds'] for _s in samples]),
+		'pull_seconds': percentiles([_s['pull_seconds'] for _s in samples]),
+		'sql_statements': percentiles([_s['sql_statements'] for _s in samples]),
+		'panels': {},
+	}
+	for title in samples[0]['panels'] if samples else []:
+		summary['panels'][title] = {
+			'construction_seconds': percentiles([_s['panels'][title]['construction_seconds'] for _s in samples]),
+			'sql_statements': percentiles([_s['panels'][title]['sql_statements'] for _s in samples]),
+		}
+	return summary
+
+
+def run_server(
+	stand_in_directory: str,
+	sessions: int,
+	quiet: float,
+	timeout: float,
+	env: Dict[str, str] = None,
+) -> List[Dict[str, Any]]:
+	"""Starts a fresh server and measures sessions on it one after another."""
+	port = free_port()
+	server = start_server(stand_in_directory=stand_in_directory, port=port, env=env)
+	try:
+		return [measure_session(port=port, quiet=quiet, timeout=timeout) for _ in range(sessions)]
+	finally:
+		server.terminate()
+		server.wait()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--servers', type=int, default=3, help='Fresh servers started per scenario')
+	parser.add_argument('--sessions', type=int, default=5, help='Sessions opened one after another per server')
+	parser.add_argument('--quiet', type=float, default=0.5, help='Seconds without changes after which a session is ready')
+	parser.add_argument('--timeout', type=float, default=120)
+	parser.add_argument('--stand-in', help='Existing stand-in directory, a fresh one is generated by default')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--scale', type=float, default=0.02, help='Volume of the generated stand-in relative to production')
+	parser.add_argument('--output', help='Results file, defaults to benchmarks/results/first_render-<commit>.json')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temporary_directory:
+		stand_in_directory = args.stand_in or temporary_directory
+		if not args.stand_in:
+			stand_in.create_stand_in(directory=stand_in_directory, seed=args.seed, scale=args.scale)
+
+		samples = {'cold': [], 'warm': [], 'prefork': []}
+		for _ in range(args.servers):
+			measured = run_server(stand_in_directory, sessions=args.sessions, quiet=args.quiet, timeout=args.timeout)
+			samples['cold'].append(measured[0])
+			samples['warm'].extend(measured[1:])
+			measured = run_server(
+				stand_in_directory,
+				sessions=1,
+				quiet=args.quiet,
+				timeout=args.timeout,
+				env={'PREFORK_WARMUP': '1'},
+			)
+			samples['prefork'].extend(measured)
+
+	results = {
+		'parameters': vars(args),
+		'scenarios': {_scenario: summarize(_samples) for _scenario, _samples in samples.items()},
+		'samples': samples,
+	}
+	output = write_results(results=results, name='first_render', output=args.output)
+
+	print(f'{"scenario":<10}{"ready p50 [s]":>16}{"ready p95 [s]":>16}{"queries p50":>14}')
+	for scenario, summary in results['scenarios'].items():
+		ready = summary['document_ready_seconds']
+		if ready['count']:
+			print(
+				f'{scenario:<10}{ready["p50"]:>16.3f}{ready["p95"]:>16.3f}{summary["sql_statements"]["p50"]:>14.0f}'
+			)
+	print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+	main()
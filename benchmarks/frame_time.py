@@ -0,0 +1,150 @@
+"""
+Measures frame times of the instrument plot while panning, in a headless browser.
+
+The candle glyphs of the Portfolio panel are rendered standalone with synthetic bars,
+once on the canvas backend with Segment wicks and once on the WebGL backend with thin VBar wicks,
+the two variants the panel switches between at its webgl_bar_threshold.
+In the browser the x range is shifted on every animation frame, the interval between frames is the frame time.
+Requires selenium with chromedriver or geckodriver, as Bokeh's PNG export does.
+
+Usage:
+	python benchmarks/frame_time.py [--bars 10000 100000 200000] [--frames 120] [--browser chromium]
+"""
+import argparse
+import os
+import tempfile
+from typing import Any, Dict, List
+
+import numpy
+from bokeh import models
+from bokeh.embed import file_html
+from bokeh.resources import INLINE
+
+from common import load_app_package, percentiles, write_results
+
+# Pans the plot by a fixed step every animation frame and reports the intervals between frames in ms
+PAN_SCRIPT = """
+const [plot_id, frames, done] = arguments
+const plot = Bokeh.documents[0].get_model_by_id(plot_id)
+const step = (plot.x_range.end - plot.x_range.start) / 200
+const intervals = []
+let previous = null
+function frame(now) {
+	if (previous !== null)
+		intervals.push(now - previous)
+	previous = now
+	if (intervals.length >= frames)
+		return done(intervals)
+	plot.x_range.setv({start: plot.x_range.start + step, end: plot.x_range.end + step})
+	requestAnimationFrame(frame)
+}
+requestAnimationFrame(frame)
+"""
+
+
+def candle_data(bars: int, rng: numpy.random.Generator) -> Dict[str, numpy.ndarray]:
+	"""Builds instrument CDS data as PortfolioController.update_instrument_plot sends it."""
+	close = 100 + numpy.cumsum(rng.normal(0, 1, bars))
+	opening = numpy.r_[close[0], close[:-1]]
+	spread = numpy.abs(rng.normal(0, 0.5, bars))
+	return {
+		'index': numpy.arange(bars, dtype='int32'),
+		'open': opening.astype('float32'),
+		'high': (numpy.maximum(opening, close) + spread).astype('float32'),
+		'low': (numpy.minimum(opening, close) - spread).astype('float32'),
+		'close': close.astype('float32'),
+		'direction': numpy.where(close >= opening, 1, -1).astype('int8'),
+	}
+
+
+def build_plot(bars: int, backend: str, seed: int) -> models.Plot:
+	"""Builds the instrument plot of a fresh PortfolioView showing bars candles on backend."""
+	load_app_package()
+	from dashboard.panels.portfolio import PortfolioView
+	view = PortfolioView(
+		logger_name=__name__,
+		instrument_plot_width=1280,
+		instrument_plot_height=720,
+		sector_table_width=640,
+		sector_table_height=360,
+		panel_title='Portfolio',
+		webgl_bar_threshold=0,
+	)
+	plot = view.instrument_plot
+	plot.output_backend = backend
+	source = models.ColumnDataSource(data=candle_data(bars=bars, rng=numpy.random.default_rng(seed)))
+	wick = view.ohlc_wick_bar_glyph if backend == 'webgl' else view.ohlc_line_glyph
+	for glyph in [wick, view.ohlc_bar_glyph]:
+		view.attach_glyph(figure=plot, source=source, glyph=glyph)
+
+	# About a tenth of the bars visible, as after zooming into a long history
+	visible = max(bars // 10, 10)
+	plot.x_range = models.Range1d(bars - visible, bars)
+	plot.y_range = models.Range1d(float(source.data['low'].min()), float(source.data['high'].max()))
+	return plot
+
+
+def measure_frames(driver, plot: models.Plot, frames: int, directory: str) -> List[float]:
+	"""Opens plot standalone in the browser and pans it for frames animation frames.
+
+	Returns:
+		List[float]: Frame times in ms
+	"""
+	path = os.path.join(directory, f'{plot.id}.html')
+	with open(path, 'w') as _file:
+		_file.write(file_html(plot, resources=INLINE, title='frame_time'))
+	driver.get(f'file://{path}')
+	driver.set_script_timeout(120)
+	# Waits for the plot view, building WebGL views is asynchronous
+	driver.execute_async_script(
+		"""
+		const done = arguments[0]
+		const wait = () => window.Bokeh && Object.keys(Bokeh.index).length ? requestAnimationFrame(done) : setTimeout(wait, 50)
+		wait()
+		"""
+	)
+	return driver.execute_async_script(PAN_SCRIPT, plot.id, frames)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--bars', type=int, nargs='+', default=[10000, 100000, 200000])
+	parser.add_argument('--frames', type=int, default=120, help='Animation frames panned per measurement')
+	parser.add_argument('--repeat', type=int, default=3, help='Measurements per bar count and backend')
+	parser.add_argument('--browser', default=None, help='chromium or firefox, defaults to whichever is installed')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', help='Results file, defaults to benchmarks/results/frame_time-<commit>.json')
+	args = parser.parse_args()
+
+	# Needs selenium, imported here so the rest of the module loads without it
+	from bokeh.io.webdriver import webdriver_control
+
+	results: Dict[str, Any] = {'parameters': vars(args), 'scenarios': {}}
+	driver = webdriver_control.create(args.browser)
+	try:
+		with tempfile.TemporaryDirectory() as directory:
+			for bars in args.bars:
+				for backend in ['canvas', 'webgl']:
+					samples = []
+					for _ in range(args.repeat):
+						plot = build_plot(bars=bars, backend=backend, seed=args.seed)
+						samples.extend(measure_frames(driver, plot=plot, frames=args.frames, directory=directory))
+					results['scenarios'][f'{backend}-{bars}'] = {
+						'bars': bars,
+						'backend': backend,
+						'frame_ms': percentiles(samples),
+					}
+	finally:
+		webdriver_control.terminate(driver)
+
+	output = write_results(results=results, name='frame_time', output=args.output)
+
+	print(f'{"bars":>10}{"backend":>10}{"frame p50 [ms]":>18}{"frame p95 [ms]":>18}')
+	for scenario in results['scenarios'].values():
+		frame_ms = scenario['frame_ms']
+		print(f'{scenario["bars"]:>10}{scenario["backend"]:>10}{frame_ms["p50"]:>18.1f}{frame_ms["p95"]:>18.1f}')
+	print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+	main()
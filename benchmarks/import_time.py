@@ -0,0 +1,63 @@
+"""
+Profiles the import time of the app modules a Bokeh worker loads before it can serve its first session.
+
+Usage:
+	python benchmarks/import_time.py [--top 25]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+from common import APP_ROOT
+
+PANEL_MODULES = ['portfolio', 'company_financials', 'earnings_calendar']
+
+
+def profile_imports() -> List[Tuple[str, int, int]]:
+	"""Imports the app panels in a fresh interpreter with `-X importtime`.
+
+	Returns:
+		List[Tuple[str, int, int]]: Module name, self and cumulative import time in microseconds
+	"""
+	# Same as common.load_app_package, inlined so that the profile holds nothing but the app
+	code = '; '.join(
+		[
+		'import importlib.util, sys',
+		f'spec = importlib.util.spec_from_file_location("dashboard", {os.path.join(APP_ROOT, "__init__.py")!r}, submodule_search_locations=[{APP_ROOT!r}])', # Yapf:disable
+		'package = sys.modules["dashboard"] = importlib.util.module_from_spec(spec)',
+		'spec.loader.exec_module(package)',
+		] + [f'import dashboard.panels.{_module}' for _module in PANEL_MODULES]
+	)
+	result = subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', code],
+		capture_output=True,
+		text=True,
+		check=True,
+	)
+
+	timings = []
+	for line in result.stderr.splitlines():
+		if not line.startswith('import time:') or 'cumulative' in line:
+			continue
+		self_us, cumulative_us, module = line[len('import time:'):].split('|')
+		timings.append((module.strip(), int(self_us), int(cumulative_us)))
+	return timings
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+	args = parser.parse_args()
+
+	timings = profile_imports()
+	top_level = [_timing for _timing in timings if '.' not in _timing[0]]
+	print(f'{"module":<48}{"self [ms]":>12}{"cumulative [ms]":>18}')
+	for module, self_us, cumulative_us in sorted(top_level, key=lambda _t: _t[2], reverse=True)[:args.top]:
+		print(f'{module:<48}{self_us / 1000:>12.1f}{cumulative_us / 1000:>18.1f}')
+	print(f'{"total":<48}{"":>12}{sum(_t[1] for _t in timings) / 1000:>18.1f}')
+
+
+if __name__ == '__main__':
+	main()
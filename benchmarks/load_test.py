@@ -0,0 +1,250 @@
+"""
+Load test driving concurrent dashboard sessions through scripted interactions, against a local stand-in database.
+
+Every virtual user opens a session, builds all tabs and then repeats the script:
+	pick_instrument, update_plot, toggle_overlays, change_index, update_earnings_table, switch_kpi
+An action is timed from sending it until the session's document on the server stopped changing for the quiet
+period, so its latency includes the time its callbacks queued behind those of other sessions.
+Each level of concurrency runs on a freshly started server, whose event loop lag and RSS are recorded.
+With --payload the server also measures the patches each action sends, reported per panel and action.
+
+Usage:
+	python benchmarks/load_test.py [--users 1 2 4 8 16] [--iterations 3]
+"""
+import argparse
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from bokeh import models
+from bokeh.client import ClientSession, pull_session
+
+from client import ClientEvent
+from common import APP_PATH, free_port, percentiles, server_stats, start_server, wait_until_settled, write_results
+import stand_in
+
+ACTIONS = ['pick_instrument', 'update_plot', 'toggle_overlays', 'change_index', 'update_earnings_table', 'switch_kpi']
+
+
+class VirtualUser:
+	"""One viewer of the dashboard, scripted through its own client session."""
+
+	def __init__(self, port: int, index: int, quiet: float, timeout: float) -> None:
+		self.port = port
+		self.index = index
+		self.quiet = quiet
+		self.timeout = timeout
+		self.session: ClientSession = None
+		self.widgets: Dict[str, models.Model] = {}
+		self.latencies: Dict[str, List[float]] = {_action: [] for _action in ['open_session', *ACTIONS]}
+		self.errors: List[str] = []
+
+	@property
+	def url(self) -> str:
+		return f'http://localhost:{self.port}{APP_PATH}'
+
+	def timed(self, action: str, function: Callable[[], Any]) -> None:
+		start = time.time()
+		function()
+		stats = wait_until_settled(
+			port=self.port,
+			session_id=self.session.id,
+			quiet=self.quiet,
+			timeout=self.timeout,
+			since=start,
+			poll=self.quiet / 4,
+		)
+		self.latencies[action].append(max(stats['last_change'] - start, 0))
+
+	def open(self) -> None:
+		"""Opens a session and builds every tab, the way a viewer clicking through all of them would."""
+		start = time.time()
+		self.session = pull_session(url=self.url)
+		tabs = self.session.document.roots[0]
+		for index in [_index for _index in range(len(tabs.tabs)) if _index != tabs.active]:
+			tabs.active = index
+			self.session.force_roundtrip()
+		stats = wait_until_settled(
+			port=self.port,
+			session_id=self.session.id,
+			quiet=self.quiet,
+			timeout=self.timeout,
+			poll=self.quiet / 4,
+		)
+		self.latencies['open_session'].append(stats['last_change'] - start)
+
+		# The client drops patches it receives while waiting for replies, pull again to see the built panels
+		session = self.session
+		self.session = pull_session(session_id=session.id, url=self.url)
+		session.close()
+
+		panels = {_tab.title: _tab.child for _tab in self.session.document.roots[0].tabs}
+		portfolio, earnings, financials = panels['Portfolio'], panels['Earnings Calendar'], panels['Company Financials']
+		self.widgets = {
+			'instrument': portfolio.select_one({'type': models.Select, 'title': 'Instrument'}),
+			'update_plot': portfolio.select_one({'type': models.Button, 'label': 'Update plot'}),
+			'toggles': [
+			_toggle for _toggle in portfolio.select({'type': models.Toggle})
+			if _toggle.label in ['Open Pos.', 'Closed Pos.', 'Open Orders']
+			],
+			'index': earnings.select_one({'type': models.Select, 'title': 'Filter for index'}),
+			'update_earnings': earnings.select_one({'type': models.Button, 'label': 'Update'}),
+			'kpi': financials.select_one({'type': models.Select, 'title': 'KPI'}),
+			'update_financials': financials.select_one({'type': models.Button, 'label': 'Update'}),
+		}
+
+	def script(self, iteration: int) -> List[Tuple[str, Callable[[], Any]]]:
+		"""Gets the actions of one pass, users start at different options so their queries differ."""
+		step = self.index + iteration + 1
+
+		def pick(select: models.Select) -> None:
+			options = [_o[0] if isinstance(_o, tuple) else _o for _o in select.options]
+			select.value = options[step % len(options)]
+			self.session.force_roundtrip()
+
+		def click(button: models.Button) -> None:
+			ClientEvent(name='button_click', model=button).send(self.session)
+
+		def toggle_overlays() -> None:
+			for toggle in self.widgets['toggles']:
+				toggle.active = not toggle.active
+			self.session.force_roundtrip()
+
+		def switch_kpi() -> None:
+			pick(self.widgets['kpi'])
+			click(self.widgets['update_financials'])
+
+		return [
+			('pick_instrument', lambda: pick(self.widgets['instrument'])),
+			('update_plot', lambda: click(self.widgets['update_plot'])),
+			('toggle_overlays', toggle_overlays),
+			('change_index', lambda: pick(self.widgets['index'])),
+			('update_earnings_table', lambda: click(self.widgets['update_earnings'])),
+			('switch_kpi', switch_kpi),
+		]
+
+	def run(self, iterations: int, start: threading.Barrier) -> None:
+		try:
+			self.open()
+			start.wait()
+			for iteration in range(iterations):
+				for action, function in self.script(iteration=iteration):
+					self.timed(action=action, function=function)
+		except Exception as e:
+			self.errors.append(repr(e))
+			start.abort()
+		finally:
+			if self.session is not None:
+				self.session.close()
+
+
+def run_level(
+	stand_in_directory: str,
+	users: int,
+	iterations: int,
+	quiet: float,
+	timeout: float,
+	payload: bool = False,
+) -> Dict[str, Any]:
+	"""Runs all virtual users of one level of concurrency against a fresh server."""
+	port = free_port()
+	server = start_server(
+		stand_in_directory=stand_in_directory,
+		port=port,
+		env={'PAYLOAD_METRICS': '1'} if payload else None,
+	)
+	try:
+		virtual_users = [VirtualUser(port=port, index=_i, quiet=quiet, timeout=timeout) for _i in range(users)]
+		# Loop lag sampling restarts once every session is open, right before the scripts run
+		start = threading.Barrier(users + 1)
+		threads = [
+			threading.Thread(target=_user.run, kwargs=dict(iterations=iterations, start=start))
+			for _user in virtual_users
+		]
+		for thread in threads:
+			thread.start()
+		try:
+			start.wait()
+			server_stats(port=port, reset=True)
+		except threading.BrokenBarrierError:
+			pass
+		started = time.time()
+		for thread in threads:
+			thread.join()
+		elapsed = time.time() - started
+		stats = server_stats(port=port)
+	finally:
+		server.terminate()
+		server.wait()
+
+	latencies = {
+		_action: [_latency for _user in virtual_users for _latency in _user.latencies[_action]]
+		for _action in ['open_session', *ACTIONS]
+	}
+	scripted = [_latency for _action in ACTIONS for _latency in latencies[_action]]
+	return {
+		'users': users,
+		'latency_seconds': {_action: percentiles(_samples) for _action, _samples in latencies.items()},
+		'all_actions_seconds': percentiles(scripted),
+		'actions_per_second': len(scripted) / elapsed if elapsed > 0 else None,
+		'loop_lag_seconds': stats['loop_lag_seconds'],
+		'rss_bytes': stats['rss_bytes'],
+		'peak_rss_bytes': stats['peak_rss_bytes'],
+		'sql_statements': stats['sql_statements'],
+		'payload': stats.get('payload'),
+		'errors': [_error for _user in virtual_users for _error in _user.errors],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--users', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Concurrent sessions per level')
+	parser.add_argument('--iterations', type=int, default=3, help='Passes through the script per user')
+	parser.add_argument('--quiet', type=float, default=1.0, help='Seconds without changes after which an action is done')
+	parser.add_argument('--timeout', type=float, default=300)
+	parser.add_argument('--stand-in', help='Existing stand-in directory, a fresh one is generated by default')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--scale', type=float, default=0.02, help='Volume of the generated stand-in relative to production')
+	parser.add_argument('--payload', action='store_true', help='Measure patches sent per action, adds serialization work')
+	parser.add_argument('--output', help='Results file, defaults to benchmarks/results/load_test-<commit>.json')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as temporary_directory:
+		stand_in_directory = args.stand_in or temporary_directory
+		if not args.stand_in:
+			stand_in.create_stand_in(directory=stand_in_directory, seed=args.seed, scale=args.scale)
+
+		levels = []
+		for users in args.users:
+			levels.append(
+				run_level(
+				stand_in_directory,
+				users=users,
+				iterations=args.iterations,
+				quiet=args.quiet,
+				timeout=args.timeout,
+				payload=args.payload,
+				)
+			)
+			level = levels[-1]
+			print(
+				f'{users:>4} users | actions p50 {level["all_actions_seconds"].get("p50", float("nan")):.3f} s'
+				f' p95 {level["all_actions_seconds"].get("p95", float("nan")):.3f} s'
+				f' | loop lag p99 {level["loop_lag_seconds"].get("p99", float("nan")) * 1000:.1f} ms'
+				f' | RSS {level["rss_bytes"] / 1e6:.0f} MB | errors {len(level["errors"])}'
+			)
+			for panel, actions in (level['payload'] or {}).items():
+				for action, totals in actions.items():
+					print(
+						f'{"":>10}{panel} {action}: {totals["messages"] / totals["runs"]:.1f} messages'
+						f' {(totals["bytes"] + totals["buffer_bytes"]) / totals["runs"] / 1000:.1f} kB'
+						f' {totals["serialization_seconds"] / totals["runs"] * 1000:.1f} ms per run'
+					)
+
+	output = write_results(results={'parameters': vars(args), 'levels': levels}, name='load_test', output=args.output)
+	print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,123 @@
+"""
+Micro-benchmark of the per call overhead Base.log_call and the shared log handler add to a decorated method.
+
+Measured per configuration, the decorated method itself does nothing:
+	undecorated: plain method call, the baseline
+	disabled: log level WARNING, records are never created
+	color / json: INFO records formatted as colored text or JSON lines
+	sampled: INFO records of which LOG_SAMPLE_RATE are written, the rest is dropped before formatting
+	legacy: the previous decorator and formatter, with one handler added per constructed panel
+Records are written to os.devnull, so the timings hold the logging work but no terminal I/O.
+
+Usage:
+	python benchmarks/logging_overhead.py [--repeat 20] [--panels 10] [--sample-rate 0.01]
+"""
+import argparse
+import logging
+import os
+import time
+from functools import wraps
+from typing import Any, Callable, Dict
+
+from common import load_app_package, measure, percentiles, write_results
+
+# Calls per sample, a single call is too fast to time
+BATCH = 1000
+
+
+class _LegacyFormatter(logging.Formatter):
+	"""Formatter creating a new logging.Formatter for every record, as the colored formatter used to."""
+
+	def format(self, record):
+		formatter = logging.Formatter('%(levelname)s:%(asctime)s | %(filename)s:%(lineno)d:\n%(message)s')
+		formatter.datefmt = '%Y-%m-%dT%H:%M:%S'
+		return formatter.format(record)
+
+
+def legacy_log_call(func: Callable):
+	"""Base.log_call as it used to be, formatting f-strings of all arguments on every call."""
+
+	@wraps(func)
+	def wrapper(self, *args, **kwargs):
+		self.log.info(f'Calling function: {func.__name__}. Args:\n{list(args)} {dict(kwargs)}')
+		_start = time.time()
+		_r = func(self, *args, **kwargs)
+		self.log.info(f'Function {func.__name__} finished. Execution time: {round(time.time()-_start, 2)}')
+		return _r
+
+	return wrapper
+
+
+def benchmark_configurations(repeat: int, panels: int, sample_rate: float) -> Dict[str, Any]:
+	load_app_package()
+	from dashboard.panels.base import Base
+	from dashboard.helpers.helpers import Helpers
+
+	class Model(Base):
+
+		def plain(self, data_set: str, column: str, value: str) -> None:
+			pass
+
+		@Base.log_call
+		def decorated(self, data_set: str, column: str, value: str) -> None:
+			pass
+
+		@legacy_log_call
+		def legacy(self, data_set: str, column: str, value: str) -> None:
+			pass
+
+	devnull = open(os.devnull, 'w')
+	model = Model(logger_name='benchmarks.logging_overhead')
+	kwargs = dict(data_set='open_positions_data_set', column='symbol', value='AAPL')
+
+	def per_call(method: Callable) -> Dict[str, float]:
+
+		def calls() -> None:
+			for _ in range(BATCH):
+				method(**kwargs)
+
+		return percentiles([_s / BATCH for _s in measure(calls, repeat=repeat)])
+
+	results = {'undecorated_seconds': per_call(model.plain)}
+	for case, configuration in [
+		('disabled', dict(level='WARNING')),
+		('color', dict(level='INFO', log_format='color')),
+		('json', dict(level='INFO', log_format='json')),
+		('sampled', dict(level='INFO', log_format='color', sample_rate=sample_rate)),
+	]:
+		Helpers.configure_logging(stream=devnull, **configuration)
+		results[f'{case}_seconds'] = per_call(model.decorated)
+
+	# One handler per panel constructed so far, each of them formatting every record again
+	legacy = logging.getLogger('benchmarks.logging_overhead.legacy')
+	legacy.propagate = False
+	legacy.setLevel(logging.DEBUG)
+	for _ in range(panels):
+		handler = logging.StreamHandler(devnull)
+		handler.setFormatter(_LegacyFormatter())
+		legacy.addHandler(handler)
+	model.log = legacy
+	results['legacy_seconds'] = per_call(model.legacy)
+
+	devnull.close()
+	return results
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--repeat', type=int, default=20, help='Timed samples per configuration')
+	parser.add_argument('--panels', type=int, default=10, help='Panels constructed before the legacy measurement')
+	parser.add_argument('--sample-rate', type=float, default=0.01, help='Share of INFO records written when sampled')
+	parser.add_argument('--output', help='Results file, defaults to benchmarks/results/logging_overhead-<commit>.json')
+	args = parser.parse_args()
+
+	results = benchmark_configurations(repeat=args.repeat, panels=args.panels, sample_rate=args.sample_rate)
+	output = write_results(results={'parameters': vars(args), 'calls': results}, name='logging_overhead', output=args.output)
+
+	for name, timings in results.items():
+		print(f'{name:<24}{timings["p50"] * 1e6:>10.2f} us per call')
+	print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,222 @@
+"""
+Micro-benchmarks of the query and cache layer of BaseModel, against a local stand-in database.
+
+Measured per result size:
+	registry_hit: result still held by a session, served from the shared registry
+	disk_hit: served from the pickle cache file
+	miss: fetched from the database and written to the cache file
+	uncached: fetched from the database without touching the cache
+	serialization: write and read time and file size per format, formats needing pyarrow only if installed
+	read_sql: read_sql_query against fetching the raw rows, the difference is the DataFrame conversion
+Plus SHA-256 cache key computation per query length and Helpers.file_exists for present and missing files.
+
+Usage:
+	python benchmarks/query_cache.py [--sizes 1000 10000 100000] [--repeat 20] [--seed 0]
+"""
+import argparse
+import gc
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy
+import pandas
+
+from common import load_app_package, measure, percentiles, write_results
+import stand_in
+
+# Calls per sample for operations too fast to time one by one
+BATCH = 1000
+
+
+def result_frame(rows: int, rng: numpy.random.Generator) -> pandas.DataFrame:
+	"""Builds a result shaped like the instrument and position data sets, with a string column."""
+	return pandas.DataFrame({
+		'datetime': pandas.Timestamp('2015-01-01') + pandas.to_timedelta(numpy.arange(rows) * 5, unit='min'),
+		'symbol': rng.choice([f'SYM{_i:03d}' for _i in range(500)], rows),
+		'open': rng.uniform(50, 150, rows),
+		'high': rng.uniform(50, 150, rows),
+		'low': rng.uniform(50, 150, rows),
+		'close': rng.uniform(50, 150, rows),
+		'volume': rng.integers(0, 1_000_000, rows),
+	})
+
+
+def serializers() -> Dict[str, Tuple[Callable[[pandas.DataFrame, str], Any], Callable[[str], pandas.DataFrame]]]:
+	"""Gets writer and reader per serialization format available in this environment."""
+	formats = {
+		'pickle': (lambda df, path: df.to_pickle(path), pandas.read_pickle),
+		'npz': (
+			lambda df, path: numpy.savez(path, **{_c: df[_c].to_numpy() for _c in df.columns}),
+			lambda path: pandas.DataFrame(dict(numpy.load(path, allow_pickle=True).items())),
+		),
+		'csv': (lambda df, path: df.to_csv(path, index=False), lambda path: pandas.read_csv(path, parse_dates=['datetime'])),
+		'json': (lambda df, path: df.to_json(path, orient='split', index=False), lambda path: pandas.read_json(path, orient='split')), # Yapf:disable
+	}
+	if importlib.util.find_spec('pyarrow') is not None:
+		formats['parquet'] = (lambda df, path: df.to_parquet(path, index=False), pandas.read_parquet)
+		formats['feather'] = (lambda df, path: df.to_feather(path), pandas.read_feather)
+	return formats
+
+
+def benchmark_serialization(df: pandas.DataFrame, directory: str, repeat: int) -> Dict[str, Any]:
+	results = {}
+	for name, (write, read) in serializers().items():
+		path = os.path.join(directory, f'serialized.{name}')
+		if name == 'npz':
+			path += '.npz'
+		results[name] = {
+			'write_seconds': percentiles(measure(lambda: write(df, path), repeat=repeat)),
+			'read_seconds': percentiles(measure(lambda: read(path), repeat=repeat)),
+			'bytes': os.path.getsize(path),
+		}
+	return results
+
+
+def benchmark_size(model, rows: int, directory: str, repeat: int) -> Dict[str, Any]:
+	"""Runs the query layer benchmarks for the stand-in table holding rows rows."""
+	sql_query = f'''
+		SELECT `datetime`, `symbol`, `open`, `high`, `low`, `close`, `volume`
+		FROM `dl_benchmark`.`rows_{rows}`
+		'''
+	cache_directory = os.getenv('PATH_CACHE')
+
+	def clear_cache() -> None:
+		shutil.rmtree(cache_directory, ignore_errors=True)
+		os.makedirs(cache_directory, exist_ok=True)
+
+	results = {}
+	clear_cache()
+	pinned = model.query(sql_query=sql_query)
+	results['bytes_in_memory'] = int(pinned.memory_usage(deep=True).sum())
+	results['registry_hit_seconds'] = percentiles(measure(lambda: model.query(sql_query=sql_query), repeat=repeat))
+	del pinned
+	gc.collect()
+	results['disk_hit_seconds'] = percentiles(measure(lambda: model.query(sql_query=sql_query), repeat=repeat))
+	results['miss_seconds'] = percentiles(measure(lambda: model.query(sql_query=sql_query), repeat=repeat, setup=clear_cache)) # Yapf:disable
+	results['uncached_seconds'] = percentiles(measure(lambda: model.query(sql_query=sql_query, cache=False), repeat=repeat)) # Yapf:disable
+
+	def fetch_raw_rows() -> None:
+		connection = model.engine.raw_connection()
+		try:
+			connection.cursor().execute(sql_query).fetchall()
+		finally:
+			connection.close()
+
+	results['raw_fetch_seconds'] = percentiles(measure(fetch_raw_rows, repeat=repeat))
+	results['read_sql_query_seconds'] = percentiles(
+		measure(lambda: pandas.read_sql_query(sql_query, con=model.engine), repeat=repeat)
+	)
+	results['conversion_seconds_p50'] = results['read_sql_query_seconds']['p50'] - results['raw_fetch_seconds']['p50']
+
+	for case in ['registry_hit', 'disk_hit', 'miss', 'uncached']:
+		p50 = results[f'{case}_seconds']['p50']
+		results[f'{case}_throughput'] = {
+			'queries_per_second': 1 / p50,
+			'rows_per_second': rows / p50,
+			'megabytes_per_second': results['bytes_in_memory'] / p50 / 1e6,
+		}
+
+	results['serialization'] = benchmark_serialization(
+		df=model.query(sql_query=sql_query, cache=False),
+		directory=directory,
+		repeat=repeat,
+	)
+	clear_cache()
+	return results
+
+
+def benchmark_keys(repeat: int, rng: numpy.random.Generator) -> Dict[str, Any]:
+	results = {}
+	for length in [100, 1_000, 10_000]:
+		sql_query = ''.join(rng.choice(list('SELECT abcdefghijklmnopqrstuvwxyz_`,.\n\t'), length))
+
+		def compute_keys() -> None:
+			for _ in range(BATCH):
+				hashlib.sha256(str.encode(sql_query.replace('%', r'%%'))).hexdigest()
+
+		results[f'sha256_{length}_chars_seconds'] = percentiles([_s / BATCH for _s in measure(compute_keys, repeat=repeat)])
+	return results
+
+
+def benchmark_file_exists(helpers, directory: str, repeat: int) -> Dict[str, Any]:
+	present = os.path.join(directory, 'present')
+	open(present, 'w').close()
+	missing = os.path.join(directory, 'missing')
+	results = {}
+	for case, path in [('present', present), ('missing', missing)]:
+
+		def check() -> None:
+			for _ in range(BATCH):
+				helpers.file_exists(file=path)
+
+		results[f'file_exists_{case}_seconds'] = percentiles([_s / BATCH for _s in measure(check, repeat=repeat)])
+	return results
+
+
+def create_result_tables(directory: str, sizes: List[int], seed: int) -> None:
+	rng = numpy.random.default_rng(seed)
+	connection = sqlite3.connect(os.path.join(directory, 'dl_benchmark.db'))
+	for rows in sizes:
+		result_frame(rows=rows, rng=rng).to_sql(f'rows_{rows}', connection, index=False, if_exists='replace')
+	connection.commit()
+	connection.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='Result sizes in rows')
+	parser.add_argument('--repeat', type=int, default=20, help='Timed runs per measurement')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', help='Results file, defaults to benchmarks/results/query_cache-<commit>.json')
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as directory:
+		os.environ['DATABASE_URL'] = stand_in.url(directory)
+		os.environ['PATH_CACHE'] = os.path.join(directory, 'cache', '')
+		create_result_tables(directory=directory, sizes=args.sizes, seed=args.seed)
+		stand_in.attach_schemas(directory)
+
+		load_app_package()
+		from dashboard.panels.base import BaseModel
+		from dashboard.helpers.helpers import Helpers
+		model = BaseModel(logger_name='benchmarks.query_cache')
+		# Keep per query logging out of the timings, it is measured on its own
+		model.log.setLevel(logging.WARNING)
+
+		rng = numpy.random.default_rng(args.seed)
+		results = {
+			'parameters': vars(args),
+			'sizes': {
+				str(_rows): benchmark_size(model=model, rows=_rows, directory=directory, repeat=args.repeat)
+				for _rows in args.sizes
+			},
+			'keys': benchmark_keys(repeat=args.repeat, rng=rng),
+			'file_exists': benchmark_file_exists(helpers=Helpers(), directory=directory, repeat=args.repeat),
+		}
+		BaseModel.dispose_engine()
+
+	output = write_results(results=results, name='query_cache', output=args.output)
+
+	cases = ['registry_hit', 'disk_hit', 'miss', 'uncached', 'read_sql_query', 'raw_fetch']
+	print(f'{"rows":>10}' + ''.join(f'{_case:>16}' for _case in cases) + '   p50 [ms]')
+	for rows, result in results['sizes'].items():
+		print(f'{rows:>10}' + ''.join(f'{result[f"{_case}_seconds"]["p50"] * 1000:>16.3f}' for _case in cases))
+	for rows, result in results['sizes'].items():
+		print(f'serialization of {rows} rows, p50 write / read [ms], size [kB]:')
+		for name, timings in result['serialization'].items():
+			print(
+				f'{name:>12}{timings["write_seconds"]["p50"] * 1000:>12.3f}{timings["read_seconds"]["p50"] * 1000:>12.3f}{timings["bytes"] / 1000:>12.0f}'
+			)
+	for name, timings in {**results['keys'], **results['file_exists']}.items():
+		print(f'{name:<36}{timings["p50"] * 1e6:>10.2f} us')
+	print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,167 @@
+"""
+Serves the dashboard against a local stand-in database, the way `bokeh serve` would, for benchmarks to drive.
+Server side counters, per session timings, event loop lag and memory are exposed as JSON on /benchmark/stats,
+as well as the patch payload per panel and action while PAYLOAD_METRICS is set.
+
+Usage:
+	python benchmarks/server.py --stand-in DIRECTORY [--port 5006]
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from bokeh.application.handlers.handler import Handler
+from bokeh.document import Document
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from tornado.ioloop import IOLoop
+from tornado.web import RequestHandler
+
+from common import APP_ROOT, APP_PATH, percentiles
+import stand_in
+
+# Counters of this process, fetches increment them from the worker pool
+_counters = {'sql_statements': 0}
+_counters_lock = threading.Lock()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+	with _counters_lock:
+		_counters['sql_statements'] += 1
+
+
+class SessionTimings(Handler):
+	"""
+	Records per session when it was created, when its document was built and when the document last changed.
+	The Bokeh client drops document patches while it waits for a reply, so benchmarks judge from these
+	whether the server is done updating a session. Times are wall clock seconds.
+	"""
+
+	def __init__(self) -> None:
+		super().__init__()
+		self.sessions: Dict[str, Dict[str, float]] = {}
+
+	async def on_session_created(self, session_context) -> None:
+		self.sessions[session_context.id] = {'created': time.time()}
+
+	def modify_document(self, doc: Document) -> None:
+		# Runs after the app's own handler, the document is fully built
+		timings = self.sessions.setdefault(doc.session_context.id, {})
+		timings.update(initialized=time.time(), last_change=time.time(), changes=0)
+
+		def record(event) -> None:
+			timings['last_change'] = time.time()
+			timings['changes'] += 1
+
+		doc.on_change(record)
+
+	async def on_session_destroyed(self, session_context) -> None:
+		self.sessions.pop(session_context.id, None)
+
+
+class LoopLagMonitor:
+	"""Samples how late the server loop runs a callback scheduled every interval, i.e. how long callbacks queue."""
+
+	def __init__(self, interval: float = 0.05) -> None:
+		self.interval = interval
+		self.samples: List[float] = []
+
+	def start(self) -> None:
+		self._schedule()
+
+	def _schedule(self) -> None:
+		expected = IOLoop.current().time() + self.interval
+		IOLoop.current().call_at(expected, self._sample, expected)
+
+	def _sample(self, expected: float) -> None:
+		self.samples.append(IOLoop.current().time() - expected)
+		self._schedule()
+
+
+def memory() -> Dict[str, int]:
+	"""Gets resident and peak resident memory of this process in bytes."""
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+	try:
+		with open('/proc/self/statm') as _statm:
+			resident = int(_statm.read().split()[1]) * resource.getpagesize()
+	except OSError:
+		resident = peak
+	return {'rss_bytes': resident, 'peak_rss_bytes': peak}
+
+
+def payload_metrics():
+	"""Gets the app's PayloadMetrics, the app package is imported by Bokeh under a generated module name."""
+	for name, module in list(sys.modules.items()):
+		if name.endswith('.panels.payload'):
+			return module.PayloadMetrics.shared()
+
+
+_session_timings = SessionTimings()
+_loop_lag = LoopLagMonitor()
+
+
+class StatsHandler(RequestHandler):
+
+	def get(self):
+		session_id = self.get_argument('session', None)
+		sessions = _session_timings.sessions
+		if session_id is not None:
+			sessions = {session_id: sessions[session_id]} if session_id in sessions else {}
+		with _counters_lock:
+			stats = dict(_counters)
+		stats.update(
+			sessions=sessions,
+			loop_lag_seconds=percentiles(_loop_lag.samples),
+			**memory(),
+		)
+		metrics = payload_metrics()
+		if metrics is not None and metrics.enabled:
+			stats['payload'] = metrics.report()
+		if self.get_argument('reset', None):
+			_loop_lag.samples = []
+			if metrics is not None:
+				metrics.reset()
+
+		self.set_header('Content-Type', 'application/json')
+		self.write(json.dumps(stats))
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--stand-in', required=True, help='Directory of the stand-in database')
+	parser.add_argument('--port', type=int, default=5006)
+	parser.add_argument('--log-level', default='warning', choices=['debug', 'info', 'warning', 'error', 'critical'])
+	args = parser.parse_args()
+
+	logging.basicConfig(level=args.log_level.upper())
+	os.environ['DATABASE_URL'] = stand_in.url(args.stand_in)
+	# SQLite has no information_schema, keep live refresh from polling the stand-in during a run
+	os.environ.setdefault('LIVE_REFRESH_PERIOD_MS', str(24 * 60 * 60 * 1000))
+	stand_in.attach_schemas(args.stand_in)
+
+	# Imported late, so that app hooks see the environment when the handler loads them
+	from bokeh.command.util import build_single_handler_application
+	from bokeh.server.server import Server
+
+	application = build_single_handler_application(APP_ROOT)
+	application.add(_session_timings)
+	server = Server(
+		{APP_PATH: application},
+		port=args.port,
+		allow_websocket_origin=[f'localhost:{args.port}'],
+		extra_patterns=[('/benchmark/stats', StatsHandler)],
+	)
+	server.start()
+	server.io_loop.add_callback(_loop_lag.start)
+	server.io_loop.start()
+
+
+if __name__ == '__main__':
+	main()
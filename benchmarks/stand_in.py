@@ -0,0 +1,52 @@
+"""
+Local stand-in for the dashboard's MySQL database.
+Every `dl_*` schema is a SQLite file attached under its schema name, so the app's queries run unchanged.
+"""
+import glob
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import synthetic
+
+
+def url(directory: str) -> str:
+	"""Gets the DATABASE_URL pointing the app at a stand-in created in directory.
+	Declared TIMESTAMP columns are parsed, so datetimes arrive as on MySQL."""
+	return f'sqlite:///{os.path.join(directory, "main.db")}?detect_types=1'
+
+
+def attach_schemas(directory: str) -> None:
+	"""Attaches every schema file of the stand-in to each new connection of any engine in this process.
+
+	Args:
+		directory (str): Directory holding one `<schema>.db` file per schema
+	"""
+	schemas = {os.path.basename(path)[:-3]: path for path in glob.glob(os.path.join(directory, 'dl_*.db'))}
+
+	@event.listens_for(Engine, 'connect')
+	def attach(dbapi_connection, connection_record):
+		for schema, path in schemas.items():
+			dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS `{schema}`")
+
+
+def create_stand_in(directory: str, seed: int = 0, scale: float = 0.02) -> str:
+	"""Writes synthetic tables into one SQLite file per schema in directory, replacing existing ones.
+
+	Args:
+		directory (str): Target directory
+		seed (int, optional): Random seed. Defaults to 0.
+		scale (float, optional): Volume relative to production, see synthetic.py. Defaults to 0.02.
+
+	Returns:
+		str: DATABASE_URL of the stand-in
+	"""
+	os.makedirs(directory, exist_ok=True)
+	for path in glob.glob(os.path.join(directory, '*.db')):
+		os.remove(path)
+
+	synthetic.write_sqlite(directory=directory, tables=synthetic.generate_tables(scale=scale, seed=seed))
+	sqlite3.connect(os.path.join(directory, 'main.db')).close()
+	return url(directory)
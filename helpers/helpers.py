@@ -1,15 +1,70 @@
 import os
+import json
+import random
 import logging
+import datetime
+import threading
 import sys
 
 
 class Helpers():
+	# Handler shared by all loggers handed out by get_logger, set up once per process
+	_handler: logging.Handler = None
+	_level: int = logging.INFO
+	_sample_rate: float = 1
+	_loggers: set = set()
+	_lock = threading.Lock()
 
 	def file_exists(self, file: str) -> bool:
 		return os.path.isfile(file)
 
+	@staticmethod
+	def configure_logging(
+		level: str = None,
+		log_format: str = None,
+		sample_rate: float = None,
+		stream=None,
+	) -> logging.Handler:
+		"""Sets up the handler shared by all loggers handed out by get_logger, replacing the previous one.
+
+		Args:
+			level (str, optional): Lowest level logged. Defaults to env LOG_LEVEL or 'INFO'.
+			log_format (str, optional): 'color' for colored text, 'json' for one JSON object per line.
+			Defaults to env LOG_FORMAT or 'color'.
+			sample_rate (float, optional): Share of records below WARNING that get written.
+			Defaults to env LOG_SAMPLE_RATE or 1.
+			stream (optional): Stream written to. Defaults to sys.stdout.
+
+		Returns:
+			logging.Handler:
+		"""
+		log_format = log_format or os.getenv('LOG_FORMAT', 'color')
+		sample_rate = float(sample_rate if sample_rate is not None else os.getenv('LOG_SAMPLE_RATE', '1'))
+		handler = logging.StreamHandler(stream or sys.stdout)
+		handler.setFormatter(_JsonFormatter() if log_format == 'json' else _CustomColoredFormatter())
+		if sample_rate < 1:
+			handler.addFilter(_SamplingFilter(sample_rate=sample_rate))
+
+		with Helpers._lock:
+			previous, Helpers._handler = Helpers._handler, handler
+			Helpers._sample_rate = sample_rate
+			Helpers._level = logging.getLevelName((level or os.getenv('LOG_LEVEL', 'INFO')).upper())
+			for name in Helpers._loggers:
+				logger = logging.getLogger(name)
+				logger.removeHandler(previous)
+				logger.addHandler(handler)
+				logger.setLevel(Helpers._level)
+		return handler
+
+	@staticmethod
+	def sampled() -> bool:
+		"""Decides whether records below WARNING get written, for callers sampling before creating any.
+		Records logged after a positive decision should pass extra={'sampled': True}, so they are not sampled again."""
+		return Helpers._sample_rate >= 1 or random.random() < Helpers._sample_rate
+
 	def get_logger(self, name: str) -> logging.Logger:
 		"""Gets custom logger that does not get handlers propagatedby Bokeh's own logger.
+		All of them write through one shared handler, which is only added once per logger.
 
 		Args:
 			name (str): Name of logger
@@ -17,12 +72,16 @@ class Helpers():
 		Returns:
 			logging.Logger:
 		"""
+		if Helpers._handler is None:
+			Helpers.configure_logging()
+
 		logger = logging.getLogger(name)
-		logger.propagate = False
-		logger.setLevel(logging.DEBUG)
-		stream_handler = logging.StreamHandler(sys.stdout)
-		stream_handler.setFormatter(_CustomColoredFormatter())
-		logger.addHandler(stream_handler)
+		with Helpers._lock:
+			if name not in Helpers._loggers:
+				Helpers._loggers.add(name)
+				logger.propagate = False
+				logger.setLevel(Helpers._level)
+				logger.addHandler(Helpers._handler)
 		return logger
 
 
@@ -37,8 +96,43 @@ class _CustomColoredFormatter(logging.Formatter):
 		logging.CRITICAL: f'\x1b[31;1m{_format}\x1b[0m',
 	}
 
+	def __init__(self) -> None:
+		super().__init__()
+		self._formatters = {
+			level: logging.Formatter(log_format, datefmt='%Y-%m-%dT%H:%M:%S')
+			for level, log_format in self.FORMATS.items()
+		}
+
+	def format(self, record):
+		return self._formatters.get(record.levelno, self._formatters[logging.INFO]).format(record)
+
+
+class _JsonFormatter(logging.Formatter):
+	'''Logging Formatter writing one JSON object per record, including extra fields passed to the logging call'''
+	_standard_attributes = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sampled'}
+
 	def format(self, record):
-		log_format = self.FORMATS[record.levelno]
-		formatter = logging.Formatter(log_format)
-		formatter.datefmt = '%Y-%m-%dT%H:%M:%S'
-		return formatter.format(record)
\ No newline at end of file
+		entry = {
+			'time': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+			'level': record.levelname,
+			'logger': record.name,
+			'file': record.filename,
+			'line': record.lineno,
+			'message': record.getMessage(),
+			**{key: value for key, value in vars(record).items() if key not in self._standard_attributes},
+		}
+		if record.exc_info:
+			entry['exception'] = self.formatException(record.exc_info)
+		return json.dumps(entry, default=str)
+
+
+class _SamplingFilter(logging.Filter):
+	'''Logging Filter passing only a share of records below WARNING, dropped records are never formatted.
+	Records marked as sampled by their caller already are passed.'''
+
+	def __init__(self, sample_rate: float) -> None:
+		super().__init__()
+		self.sample_rate = sample_rate
+
+	def filter(self, record):
+		return record.levelno >= logging.WARNING or getattr(record, 'sampled', False) or random.random() < self.sample_rate
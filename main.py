@@ -1,17 +1,23 @@
 from bokeh.io import curdoc
-from bokeh.models import Tabs
 
+from .panels.base import BaseView
+from .panels.payload import PayloadMetrics
 from .panels.company_financials import CompanyFinancials
 from .panels.portfolio import Portfolio
 from .panels.earnings_calendar import EarningsCalendar
 
-# Put panels into tabs
-_tabs = [
-	CompanyFinancials().panel,
-	EarningsCalendar().panel,
-	Portfolio().panel,
-]
-tabs = Tabs(tabs=_tabs, styles={'color': 'white'})
+# Put panels into tabs, each one is built when its tab is first opened
+tabs = BaseView.lazy_tabs(
+	panels=[
+	CompanyFinancials,
+	EarningsCalendar,
+	Portfolio,
+	],
+	styles={'color': 'white'},
+)
+
+# Measure patches sent to the browser when enabled, before the session subscribes to the document
+PayloadMetrics.shared().watch(curdoc())
 
 # Put the tabs in the current document for display
 curdoc().add_root(tabs)
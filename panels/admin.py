@@ -0,0 +1,41 @@
+from .memory import MemoryAccounting
+from .payload import PayloadMetrics
+from tornado.process import task_id
+from tornado.web import Application, RequestHandler
+
+
+class MemoryHandler(RequestHandler):
+	"""Serves memory held per session and panel. POST enforces the budget right away."""
+
+	def get(self):
+		self.write(MemoryAccounting.shared().report())
+
+	def post(self):
+		MemoryAccounting.shared().enforce_budget()
+		self.write(MemoryAccounting.shared().report())
+
+
+class PayloadHandler(RequestHandler):
+	"""Serves patch payload totals per panel and action, collected while PAYLOAD_METRICS is set."""
+
+	def get(self):
+		self.write(PayloadMetrics.shared().report())
+
+
+def start_admin_server(port: int, address: str = '127.0.0.1') -> int:
+	"""Serves the admin endpoints /admin/memory and /admin/payload as JSON on the running server loop.
+	Forked workers of `bokeh serve --num-procs` each listen on port plus their task id.
+
+	Args:
+		port (int): Port of the first worker
+		address (str): Address to listen on. Defaults to '127.0.0.1', keeping the endpoints local.
+
+	Returns:
+		int: Port listened on
+	"""
+	port += task_id() or 0
+	Application([
+		('/admin/memory', MemoryHandler),
+		('/admin/payload', PayloadHandler),
+	]).listen(port, address=address)
+	return port
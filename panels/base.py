@@ -1,12 +1,22 @@
 from bokeh import models, events, layouts
-from typing import List, Callable, Literal
-from sqlalchemy import create_engine
-from functools import wraps
+from bokeh.document import Document, without_document_lock
+from typing import List, Callable, Literal, Dict, Tuple, Any, Optional, Union
+from functools import wraps, partial
+from contextlib import contextmanager
+from operator import attrgetter
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import logging
+import threading
 import pandas
+import numpy
 import os
 import hashlib
 import time
+import weakref
 from ..helpers.helpers import Helpers
+from .payload import PayloadMetrics
+from .tracing import Span, Tracer
 
 
 class Base:
@@ -17,52 +27,224 @@ class Base:
 	) -> None:
 		self.log = Helpers().get_logger(logger_name)
 
+	@property
+	def tracer(self) -> Tracer:
+		return Tracer.shared()
+
 	def log_call(func: Callable):
 		"""
 		Decorator for wrapping function with logging of called function name, arguments and execution time.
+		Records are only created when INFO is enabled and the call is sampled, see LOG_SAMPLE_RATE,
+		and arguments are only formatted when a record is written.
+		While tracing is enabled the call is also recorded as a span carrying its arguments.
 		"""
 
 		@wraps(func)
 		def wrapper(self, *args, **kwargs):
-			self.log.info(f'Calling function: {func.__name__}. Args:\n{list(args)} {dict(kwargs)}')
-			_start = time.time()
-			_r = func(self, *args, **kwargs)
-			self.log.info(f'Function {func.__name__} finished. Execution time: {round(time.time()-_start, 2)}') #Yapf: disable
+			logged = self.log.isEnabledFor(logging.INFO) and Helpers.sampled()
+			if logged:
+				self.log.info(
+					'Calling function: %s. Args:\n%s %s',
+					func.__name__,
+					list(args),
+					kwargs,
+					extra={'sampled': True},
+				)
+				_start = time.perf_counter()
+			if self.tracer.enabled:
+				with self.tracer.span(func.__name__, args=list(args) or None, kwargs=dict(kwargs) or None):
+					_r = func(self, *args, **kwargs)
+			else:
+				_r = func(self, *args, **kwargs)
+			if logged:
+				_duration = time.perf_counter() - _start
+				self.log.info(
+					'Function %s finished. Execution time: %.2f',
+					func.__name__,
+					_duration,
+					extra={'function': func.__name__, 'duration_seconds': _duration, 'sampled': True},
+				)
 			return _r
 
 		return wrapper
 
 
 class BaseModel(Base):
-	engine = create_engine(
-		url=
-		f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}"
+	_engine = None
+	_in_flight_queries: Dict[str, List] = {}
+	# Reentrant, finalizers releasing shared data sets may run on a thread already holding it
+	_in_flight_lock = threading.RLock()
+	# Frames shared by all sessions per query, each entry a list of the frame, the number of handed out copies still
+	# alive, its monotonic fetch time and, once sorted, a weak reference to the unsorted frame and the sort column
+	_shared_data_sets: Dict[str, List] = {}
+	# Entry and frame every handed out copy was made from, by id of the copy
+	_shared_origins: Dict[int, Tuple[str, List, pandas.DataFrame]] = {}
+	# Seconds a shared frame is handed out to new callers, afterwards the query is fetched again
+	shared_data_set_ttl = float(os.getenv('SHARED_DATA_SET_TTL_SECONDS', '60'))
+	# Copies held on behalf of no session, keeping their registry entries alive, e.g. data warmed before forking
+	pinned_data_sets: List[pandas.DataFrame] = []
+	# Models refreshing data always go to the DB, but still store what they fetched in cache
+	read_cache = True
+	# Shared by all sessions, bounds the number of fetches hitting the database at once
+	worker_pool = ThreadPoolExecutor(
+		max_workers=int(os.getenv('WORKER_POOL_SIZE', '8')),
+		thread_name_prefix='fetch',
 	)
 
 	def __init__(self, logger_name) -> None:
 		super().__init__(logger_name=logger_name)
+		self._data_set_versions: Dict[str, int] = {}
+		self._partition_indexes: Dict[Tuple[str, str], Tuple[int, Dict[Any, slice]]] = {}
+		self._derived_views: Dict[Tuple, Tuple[int, Any]] = {}
 
-	def inherit_closest_index(
-		self,
-		parent_df: pandas.DataFrame,
-		child_df: pandas.DataFrame,
-		parent_on: str,
-		child_on: str,
-	) -> pandas.DataFrame:
-		child_df = child_df.sort_values(by=child_on)
-		child_df = pandas.merge_asof(
-			child_df,
-			parent_df[[parent_on, 'index']],
-			left_on=child_on,
-			right_on=parent_on,
-			direction='nearest'
-		)
-		child_df.drop(columns=[parent_on], inplace=True)
-		return child_df
+	@property
+	def engine(self):
+		"""Engine shared by all models. It is created on first use, which keeps importing panels cheap
+		and lets a pre-forking parent load modules without opening DB connections.
+		DATABASE_URL overrides the MySQL connection, e.g. to point benchmarks at a local stand-in."""
+		if BaseModel._engine is None:
+			with BaseModel._in_flight_lock:
+				if BaseModel._engine is None:
+					from sqlalchemy import create_engine
+					BaseModel._engine = create_engine(
+						url=os.getenv('DATABASE_URL') or
+						f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}"
+					)
+		return BaseModel._engine
+
+	@staticmethod
+	def dispose_engine() -> None:
+		"""Closes all pooled DB connections, so that processes forked afterwards open their own."""
+		if BaseModel._engine is not None:
+			BaseModel._engine.dispose()
+
+	def data_set_version(self, data_set: str) -> int:
+		return self._data_set_versions.get(data_set, 0)
+
+	def bump_data_set_version(self, data_set: str) -> None:
+		"""Marks data set as changed, invalidating everything derived from its previous version.
+
+		Args:
+			data_set (str): Name of data set attribute
+		"""
+		self._data_set_versions[data_set] = self.data_set_version(data_set) + 1
+
+	def partition_index(self, data_set: str, column: str) -> Dict[Any, slice]:
+		"""Gets index mapping each value of column to the contiguous row slice holding it.
+		Building it may replace the data set with a sorted copy, use partitioned to get both at once.
+
+		Args:
+			data_set (str): Name of data set attribute
+			column (str): Column to partition by
+
+		Returns:
+			Dict[Any, slice]:
+		"""
+		return self.partitioned(data_set=data_set, column=column)[1]
+
+	def partitioned(self, data_set: str, column: str) -> Tuple[pandas.DataFrame, Dict[Any, slice]]:
+		"""Gets data set sorted by column together with its partition index, the slices of which refer to that frame.
+		On first use after a version change the data set is sorted by column in place and the index is rebuilt.
+
+		Args:
+			data_set (str): Name of data set attribute
+			column (str): Column to partition by
+
+		Returns:
+			Tuple[pandas.DataFrame, Dict[Any, slice]]: Sorted data set and index
+		"""
+		version = self.data_set_version(data_set)
+		cached = self._partition_indexes.get((data_set, column))
+		if cached is not None and cached[0] == version:
+			return getattr(self, data_set), cached[1]
+
+		df: pandas.DataFrame = getattr(self, data_set)
+		if not df[column].is_monotonic_increasing:
+			df = self.sort_data_set(df=df, column=column)
+			setattr(self, f'_{data_set}', df)
+			for key in [key for key in self._partition_indexes if key[0] == data_set]:
+				del self._partition_indexes[key]
+
+		keys = df[column].to_numpy()
+		starts = numpy.flatnonzero(numpy.r_[True, keys[1:] != keys[:-1]]) if len(keys) else numpy.array([], dtype=int)
+		stops = numpy.r_[starts[1:], len(keys)]
+		index = {keys[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+		self._partition_indexes[(data_set, column)] = (version, index)
+		return df, index
+
+	def derived_view(self, data_set: str, key: Tuple, build: Callable[[], Any]) -> Any:
+		"""Gets whatever build derives from data set, computing it once per data set version and key.
+		Switching back and forth between keys reuses previously built views as long as the data set is unchanged.
+
+		Args:
+			data_set (str): Name of data set attribute the view is derived from
+			key (Tuple): Further parameters the view depends on
+			build (Callable[[], Any]): Function building the view
+
+		Returns:
+			Any: Cached or freshly built view
+		"""
+		version = self.data_set_version(data_set)
+		cached = self._derived_views.get((data_set, *key))
+		if cached is not None and cached[0] == version:
+			return cached[1]
+
+		view = build()
+		self._derived_views[(data_set, *key)] = (version, view)
+		return view
+
+	def drop_cached_views(self) -> None:
+		"""Drops derived views and partition indexes, both are rebuilt on their next use."""
+		self._derived_views = {}
+		self._partition_indexes = {}
+
+	@staticmethod
+	def closest_index(time_index: numpy.ndarray, timestamps: pandas.Series) -> numpy.ndarray:
+		"""Maps timestamps to the positions of their nearest entries in a sorted time index,
+		using one vectorized searchsorted pass.
+
+		Args:
+			time_index (numpy.ndarray): Sorted int64 nanosecond timestamps, e.g. PortfolioModel.instrument_time_index
+			timestamps (pandas.Series): Timestamps to map
+
+		Returns:
+			numpy.ndarray: Positions in time_index
+		"""
+		values = timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+		if len(time_index) < 2:
+			return numpy.zeros(len(values), dtype='int64')
+		right = numpy.searchsorted(time_index, values).clip(1, len(time_index) - 1)
+		left = right - 1
+		return numpy.where(values - time_index[left] <= time_index[right] - values, left, right)
+
+	@staticmethod
+	def to_cds_data(df: pandas.DataFrame, columns: Dict[str, str]) -> Dict[str, numpy.ndarray]:
+		"""Converts DF into ColumnDataSource data holding only passed columns as compact typed arrays.
+		Bokeh sends numeric arrays as binary buffers, so narrowing the dtypes directly shrinks the payload.
+
+		Args:
+			df (pandas.DataFrame): DF to convert
+			columns (Dict[str, str]): Column names mapped to the numpy dtype to send them as
+
+		Returns:
+			Dict[str, numpy.ndarray]:
+		"""
+		return {column: df[column].to_numpy(dtype=dtype) for column, dtype in columns.items()}
 
 	@Base.log_call
-	def filter_data_frame(self, df: pandas.DataFrame, column: str, value: str) -> pandas.DataFrame:
-		return df.loc[df[column] == value]
+	def filter_data_frame(self, data_set: str, column: str, value: str) -> pandas.DataFrame:
+		"""Filters data set for rows where column equals value as an O(1) slice through its partition index.
+
+		Args:
+			data_set (str): Name of data set attribute
+			column (str): Column to filter on
+			value (str): Value to keep
+
+		Returns:
+			pandas.DataFrame:
+		"""
+		df, index = self.partitioned(data_set=data_set, column=column)
+		return df.iloc[index.get(value, slice(0, 0))]
 
 	def query(
 		self,
@@ -79,20 +261,182 @@ class BaseModel(Base):
 
 		Returns:
 			pandas.DataFrame:
+
+		Concurrent calls with the same query share a single fetch. Cached results are kept in a registry
+		shared by all sessions, every caller gets a copy on write view of the same frame.
+		Registry frames older than shared_data_set_ttl are fetched again.
+		"""
+		with self.tracer.span('query', **{'db.statement': sql_query}) as span:
+			with BaseModel._in_flight_lock:
+				shared = BaseModel._shared_data_sets.get(sql_query)
+				if cache and self.read_cache and shared is not None and not self._is_expired(shared):
+					span.set_attributes(source='registry')
+					return self._share_data_set(sql_query=sql_query, shared=shared)
+
+				in_flight = BaseModel._in_flight_queries.get(sql_query)
+				if in_flight is None:
+					in_flight = BaseModel._in_flight_queries[sql_query] = [Future(), 0]
+					leader = True
+				else:
+					in_flight[1] += 1
+					leader = False
+
+			if not leader:
+				self.log.debug(f'Identical query already in flight, waiting for its result.')
+				span.set_attributes(source='in flight')
+				df = in_flight[0].result()
+			else:
+				try:
+					df = self._query(sql_query=sql_query, cache=cache)
+					in_flight[0].set_result(df)
+				except BaseException as e:
+					in_flight[0].set_exception(e)
+					raise
+				finally:
+					with BaseModel._in_flight_lock:
+						del BaseModel._in_flight_queries[sql_query]
+
+			span.set_attributes(rows=len(df))
+			with BaseModel._in_flight_lock:
+				if not cache or df.empty:
+					return df.copy(deep=False)
+				if leader:
+					BaseModel._shared_data_sets[sql_query] = [df, 0, time.monotonic(), None]
+				return self._share_data_set(
+					sql_query=sql_query,
+					shared=BaseModel._shared_data_sets.get(sql_query, [df, 0, time.monotonic(), None]),
+				)
+
+	@staticmethod
+	def _is_expired(shared: List) -> bool:
+		return time.monotonic() - shared[2] >= BaseModel.shared_data_set_ttl
+
+	@staticmethod
+	def _share_data_set(sql_query: str, shared: List) -> pandas.DataFrame:
+		df = shared[0].copy(deep=False)
+		shared[1] += 1
+		BaseModel._shared_origins[id(df)] = (sql_query, shared, shared[0])
+		weakref.finalize(df, BaseModel._release_data_set, sql_query, shared, id(df))
+		return df
+
+	@staticmethod
+	def _release_data_set(sql_query: str, shared: List, copy_id: int) -> None:
+		with BaseModel._in_flight_lock:
+			BaseModel._shared_origins.pop(copy_id, None)
+			shared[1] -= 1
+			if shared[1] == 0 and BaseModel._shared_data_sets.get(sql_query) is shared:
+				del BaseModel._shared_data_sets[sql_query]
+
+	@staticmethod
+	def copy_data_set(df: pandas.DataFrame) -> pandas.DataFrame:
+		"""Copies df for another session. An unchanged copy of a registry entry is copied through the registry,
+		so the entry stays shared and referenced for as long as any session holds it.
+
+		Args:
+			df (pandas.DataFrame): Frame to copy
+
+		Returns:
+			pandas.DataFrame:
+		"""
+		with BaseModel._in_flight_lock:
+			sql_query, shared, source = BaseModel._shared_origins.get(id(df), (None, None, None))
+			if source is not None and shared[0] is source and df.shape == source.shape and BaseModel._extends_frame(df=df, source=source): # Yapf:disable
+				return BaseModel._share_data_set(sql_query=sql_query, shared=shared)
+		return df.copy(deep=False)
+
+	@staticmethod
+	def expire_shared_data_sets() -> int:
+		"""Drops registry entries older than shared_data_set_ttl, so their next query fetches fresh data.
+		Sessions keep the copies they already hold.
+
+		Returns:
+			int: Number of entries dropped
+		"""
+		with BaseModel._in_flight_lock:
+			expired = [_query for _query, _shared in BaseModel._shared_data_sets.items() if BaseModel._is_expired(_shared)]
+			for sql_query in expired:
+				del BaseModel._shared_data_sets[sql_query]
+		return len(expired)
+
+	@staticmethod
+	def _extends_frame(df: pandas.DataFrame, source: pandas.DataFrame) -> bool:
+		"""Checks whether df still holds all rows and columns of source unchanged, followed by columns it added."""
+		return len(df) == len(source) and list(df.columns[:source.shape[1]]) == list(source.columns) and all(
+			numpy.may_share_memory(df.iloc[:, _position].to_numpy(), source.iloc[:, _position].to_numpy())
+			for _position in range(source.shape[1])
+		)
+
+	@staticmethod
+	def sort_data_set(df: pandas.DataFrame, column: str) -> pandas.DataFrame:
+		"""Sorts df by column, stable and with a fresh index.
+		A copy handed out by the registry is sorted once per process: the sorted frame replaces the registry's,
+		so later callers of the query receive it sorted already, and other sessions sorting their copy share it.
+		Columns a session added to its copy are sorted along, copies changed otherwise are sorted on their own.
+
+		Args:
+			df (pandas.DataFrame): Frame to sort
+			column (str): Column to sort by
+
+		Returns:
+			pandas.DataFrame:
+		"""
+		order = df[column].reset_index(drop=True).sort_values(kind='stable').index.to_numpy()
+		with BaseModel._in_flight_lock:
+			sql_query, shared, source = BaseModel._shared_origins.get(id(df), (None, None, None))
+		if source is None or not BaseModel._extends_frame(df=df, source=source):
+			return df.take(order).reset_index(drop=True)
+
+		def sorted_from_source() -> bool:
+			return shared[3] is not None and shared[3][0]() is source and shared[3][1] == column
+
+		with BaseModel._in_flight_lock:
+			build = shared[0] is source
+		if build:
+			sorted_source = source.take(order).reset_index(drop=True)
+			with BaseModel._in_flight_lock:
+				if shared[0] is source:
+					shared[0], shared[3] = sorted_source, (weakref.ref(source), column)
+		with BaseModel._in_flight_lock:
+			if not sorted_from_source():
+				return df.take(order).reset_index(drop=True)
+			sorted_df = BaseModel._share_data_set(sql_query=sql_query, shared=shared)
+
+		for position in range(source.shape[1], df.shape[1]):
+			sorted_df[df.columns[position]] = df.iloc[:, position].take(order).reset_index(drop=True)
+		return sorted_df
+
+	@staticmethod
+	def shared_data_sets() -> Dict[str, Tuple[int, int]]:
+		"""Gets size in bytes and number of live session copies of every shared data set.
+
+		Returns:
+			Dict[str, Tuple[int, int]]: Size and reference count per query
 		"""
+		with BaseModel._in_flight_lock:
+			return {
+				sql_query: (int(shared[0].memory_usage(deep=True).sum()), shared[1])
+				for sql_query, shared in BaseModel._shared_data_sets.items()
+			}
+
+	def _query(self, sql_query: str, cache: bool) -> pandas.DataFrame:
 		sql_query = sql_query.replace('%', r'%%')
 
 		if cache:
-			cached_file_name = os.getenv('PATH_CACHE') + hashlib.sha256(str.encode(sql_query)).hexdigest()
-			if Helpers().file_exists(file=cached_file_name):
+			with self.tracer.span('cache lookup') as span:
+				cached_file_name = os.getenv('PATH_CACHE') + hashlib.sha256(str.encode(sql_query)).hexdigest()
+				cached = self.read_cache and Helpers().file_exists(file=cached_file_name)
+				span.set_attributes(hit=cached)
+			if cached:
 				self.log.debug(f'Cached response exists, returning it.')
-				df = pandas.read_pickle(cached_file_name)
+				with self.tracer.span('deserialize'):
+					df = pandas.read_pickle(cached_file_name)
 				return df
 			self.log.debug(f'Cached response does not exist.')
 
-		self.log.info(f'Fetching data from MySql DB with following query:\n{sql_query}')
+		self.log.debug('Fetching data from MySql DB with following query:\n%s', sql_query)
 		try:
-			df = pandas.read_sql_query(sql_query, con=self.engine)
+			with self.tracer.span('sql'):
+				df = pandas.read_sql_query(sql_query, con=self.engine)
 			self.log.debug('Fetched successfully')
 		except Exception as e:
 			self.log.error(f'Failed executing following query:\n {sql_query}\nDue to:\n{repr(e)}')
@@ -101,7 +445,9 @@ class BaseModel(Base):
 		if cache:
 			try:
 				self.log.debug(f'Storing response in cache.')
-				df.to_pickle(cached_file_name)
+				with self.tracer.span('cache write'):
+					df.to_pickle(f'{cached_file_name}.{threading.get_ident()}.tmp')
+					os.replace(f'{cached_file_name}.{threading.get_ident()}.tmp', cached_file_name)
 			except Exception as e:
 				self.log.error(f'Failed writing cache with cached_file_name: {cached_file_name}')
 
@@ -163,6 +509,45 @@ class BaseModel(Base):
 		'''
 		return self.query(sql_query=sql_query)
 
+	def fetch_table_update_times(self, tables: List[str]) -> Dict[str, Optional[pandas.Timestamp]]:
+		"""Fetches last modification times of passed tables from information_schema in a single statement,
+		which reads table metadata only, none of their rows.
+		MySQL 8 serves these from a statistics cache refreshed every information_schema_stats_expiry seconds,
+		so it is switched off for the connection first. Servers without that variable report live times anyway.
+
+		Args:
+			tables (List[str]): Fully qualified table names, e.g. 'dl_portfolio.etoro_positions'
+
+		Returns:
+			Dict[str, Optional[pandas.Timestamp]]: Last modification per table, None while the server has not
+			recorded one, e.g. for InnoDB tables not written since the server started
+		"""
+		from sqlalchemy import text
+		from sqlalchemy.exc import DBAPIError
+		conditions = ' OR '.join(
+			f"(`TABLE_SCHEMA` = '{_schema}' AND `TABLE_NAME` = '{_table}')"
+			for _schema, _table in [table.split('.') for table in tables]
+		)
+		sql_query = f'''
+		SELECT CONCAT(`TABLE_SCHEMA`, '.', `TABLE_NAME`) AS `table`, `UPDATE_TIME` AS `update_time`
+		FROM `information_schema`.`TABLES`
+		WHERE {conditions}
+		'''
+		try:
+			with self.tracer.span('sql', **{'db.statement': sql_query}), self.engine.connect() as connection:
+				try:
+					connection.execute(text('SET SESSION information_schema_stats_expiry = 0'))
+				except DBAPIError:
+					connection.rollback()
+				df = pandas.read_sql_query(text(sql_query), con=connection)
+		except Exception as e:
+			self.log.error(f'Failed executing following query:\n {sql_query}\nDue to:\n{repr(e)}')
+			return {}
+		return {
+			table: None if pandas.isna(update_time) else pandas.Timestamp(update_time)
+			for table, update_time in zip(df['table'], df['update_time'])
+		}
+
 	def fetch_earnings_calendar(self) -> pandas.DataFrame:
 		sql_query = fr'''
 		SELECT `date`, `fiscal_date_ending`,`symbol`,  `time`
@@ -447,9 +832,411 @@ class BaseModel(Base):
 
 
 class BaseController(Base):
+	# Controllers of all live sessions, used for memory accounting
+	_instances: weakref.WeakSet = weakref.WeakSet()
 
 	def __init__(self, logger_name) -> None:
 		super().__init__(logger_name=logger_name)
+		BaseController._instances.add(self)
+		# Wall clock time of the last action triggered by the viewer
+		self.last_action = time.time()
+		self._callback_chains: Dict[Tuple[str, str], List[Callable]] = {}
+		self._stage_signatures: Dict[Tuple, Tuple] = {}
+		self._action_generations: Dict[Tuple[str, str], int] = {}
+		self._action_names: Dict[Tuple[str, str], str] = {}
+
+	@property
+	def panel_name(self) -> str:
+		return getattr(self, 'panel_title', type(self).__name__)
+
+	@property
+	def payload_metrics(self) -> PayloadMetrics:
+		return PayloadMetrics.shared()
+
+	@staticmethod
+	def live_controllers() -> List['BaseController']:
+		return list(BaseController._instances)
+
+	def stage(
+		inputs: Optional[List[str]] = None,
+		data_inputs: Optional[List[str]] = None,
+		outputs: Optional[List[str]] = None,
+		offload: bool = False,
+	):
+		"""
+		Decorator declaring what a callback reads and writes, so that callback chains run it
+		in dependency order and skip it while none of its inputs changed since its last run.
+		Names may contain {placeholders} filled from the keyword arguments the callback is appended with.
+
+		Args:
+			inputs (List[str]): Attribute paths of widget properties read, e.g. 'index_selector.value'
+			data_inputs (List[str]): Names of versioned data sets read
+			outputs (List[str]): Names of data sets written, their versions are bumped after each run
+			offload (bool): Stage only fetches data from its widget inputs and never touches the document,
+			so it may run off the event loop. Its return value, unless None, is assigned to its first output.
+			Offloaded stages of one chain must not read each other's outputs, they are fetched concurrently.
+			Defaults to False.
+		"""
+
+		def decorator(func: Callable):
+			func.stage = dict(
+				inputs=inputs or [],
+				data_inputs=data_inputs or [],
+				outputs=outputs or [],
+				offload=offload,
+			)
+			return func
+
+		return decorator
+
+	@staticmethod
+	def _stage_spec(callback: partial) -> Optional[Dict[str, Any]]:
+		spec = getattr(callback.func, 'stage', None)
+		if spec is None:
+			return None
+		return {
+			attr: [name.format(**callback.keywords) for name in value] if isinstance(value, list) else value
+			for attr, value in spec.items()
+		}
+
+	@staticmethod
+	def _stage_key(callback: partial) -> Tuple:
+		return (callback.func.__name__, callback.args, tuple(sorted(callback.keywords.items())))
+
+	def _stage_signature(self, spec: Dict[str, Any]) -> Tuple:
+		return (
+			tuple(attrgetter(path)(self) for path in spec['inputs']),
+			tuple(self.data_set_version(data_set) for data_set in spec['data_inputs']),
+		)
+
+	def _stage_is_current(self, callback: partial, signature: Tuple) -> bool:
+		return self._stage_signatures.get(self._stage_key(callback)) == signature
+
+	def pending_fetches(self, key: Tuple[str, str]) -> List[Tuple[partial, Tuple]]:
+		"""Gets offloaded stages of a callback chain whose inputs changed since their last run.
+
+		Args:
+			key (Tuple[str, str]): Callback chain key
+
+		Returns:
+			List[Tuple[partial, Tuple]]: Stages with the input signature they are about to run with
+		"""
+		pending = []
+		for callback in self.schedule_callbacks(self._callback_chains[key]):
+			spec = self._stage_spec(callback)
+			if spec is None or not spec['offload']:
+				continue
+			signature = self._stage_signature(spec)
+			if not self._stage_is_current(callback, signature):
+				pending.append((callback, signature))
+		return pending
+
+	def schedule_callbacks(self, callbacks: List[partial]) -> List[partial]:
+		"""Orders callbacks so that every stage runs after the stages producing its data inputs,
+		keeping the appended order otherwise, and drops duplicates.
+
+		Args:
+			callbacks (List[partial]): Callbacks in appended order
+
+		Returns:
+			List[partial]:
+		"""
+		pending = list({self._stage_key(callback): callback for callback in callbacks}.values())
+		specs = {id(callback): self._stage_spec(callback) or {} for callback in pending}
+		scheduled = []
+		while pending:
+			for callback in pending:
+				waits_for = set(specs[id(callback)].get('data_inputs', []))
+				if not any(
+					waits_for & set(specs[id(other)].get('outputs', [])) for other in pending if other is not callback
+				):
+					break
+			else:
+				raise RuntimeError(f'Circular stage dependencies between: {[c.func.__name__ for c in pending]}')
+			pending.remove(callback)
+			scheduled.append(callback)
+		return scheduled
+
+	def run_stage(self, callback: partial) -> None:
+		"""Runs callback unless it is a stage whose inputs did not change since its last run."""
+		spec = self._stage_spec(callback)
+		if spec is None:
+			callback()
+			return
+
+		signature = self._stage_signature(spec)
+		if self._stage_is_current(callback, signature):
+			self.log.debug('Skipping stage %s, inputs unchanged.', callback.func.__name__)
+			return
+
+		result = callback()
+		self.commit_stage(callback, result=result, signature=None if not spec['offload'] else signature)
+
+	def commit_stage(self, callback: partial, result: Any, signature: Optional[Tuple] = None) -> None:
+		"""Stores result of an offloaded stage, bumps versions of stage outputs and records its input signature.
+		An offloaded stage returning None changed nothing, so its outputs keep their versions.
+
+		Args:
+			callback (partial): Stage that ran
+			result (Any): Value returned by the stage
+			signature (Optional[Tuple]): Input signature the stage ran with. Defaults to the current one.
+		"""
+		spec = self._stage_spec(callback)
+		if spec['offload'] and result is not None:
+			setattr(self, spec['outputs'][0], result)
+		if not spec['offload'] or result is not None:
+			for data_set in spec['outputs']:
+				self.bump_data_set_version(data_set)
+		self._stage_signatures[self._stage_key(callback)] = signature or self._stage_signature(spec)
+
+	def stage_views(self) -> Dict[str, List[partial]]:
+		"""Gets data views written by stages of the callback chains, with the stages writing them.
+
+		Returns:
+			Dict[str, List[partial]]: Stages per data view name
+		"""
+		views = {}
+		for callback in [_callback for _chain in self._callback_chains.values() for _callback in _chain]:
+			for output in (self._stage_spec(callback) or {}).get('outputs', []):
+				if output.endswith('_data_view'):
+					views.setdefault(output, []).append(callback)
+		return views
+
+	def drop_stage_views(self) -> None:
+		"""Empties data views written by stages and forgets the input signatures of those stages,
+		so that the next action running one of them rebuilds its views."""
+		for view, callbacks in self.stage_views().items():
+			setattr(self, view, pandas.DataFrame())
+			for callback in callbacks:
+				self._stage_signatures.pop(self._stage_key(callback), None)
+
+	@staticmethod
+	@contextmanager
+	def batched_patches():
+		"""Collects the document patches sent to each browser connection within the block
+		and sends them as one PATCH-DOC message per connection when the block exits.
+		Bokeh sends one message per change event, the block must therefore not await,
+		as ServerConnection is patched for its duration.
+		"""
+		from bokeh.server.connection import ServerConnection
+		batches: Dict[ServerConnection, List] = {}
+		writes: Dict[ServerConnection, Any] = {}
+
+		async def written(connection: Optional[ServerConnection]) -> None:
+			# The session awaits one write per event, the first one awaits the combined message
+			if connection is not None:
+				await writes.pop(connection)
+
+		def collect(connection: ServerConnection, event) -> Any:
+			batch = batches.setdefault(connection, [])
+			batch.append(event)
+			return written(connection if len(batch) == 1 else None)
+
+		send_patch_document = ServerConnection.send_patch_document
+		ServerConnection.send_patch_document = collect
+		try:
+			yield
+		finally:
+			ServerConnection.send_patch_document = send_patch_document
+			for connection, batch in batches.items():
+				writes[connection] = connection._socket.send_message(connection.protocol.create('PATCH-DOC', batch))
+
+	@staticmethod
+	@contextmanager
+	def transaction(document: Optional[Document]):
+		"""Holds change events of passed document until the block exits, so that all model changes
+		made in it are combined before being sent to the browser. Nested transactions join the outer one.
+		Releasing the held events sends them as a single patch message per connection, see batched_patches,
+		which is traced as span 'serialize'.
+
+		Args:
+			document (Optional[Document]): Document to hold, transaction is a no-op if None
+		"""
+		owner = document is not None and document.callbacks.hold_value is None
+		if owner:
+			document.hold('combine')
+		try:
+			yield
+		finally:
+			if owner:
+				with Tracer.shared().span('serialize'), BaseController.batched_patches():
+					document.unhold()
+
+	def is_superseded(self, key: Tuple[str, str], generation: int) -> bool:
+		return self._action_generations[key] != generation
+
+	def run_callback_chain(self, model: models.Model, key: Tuple[str, str]) -> None:
+		"""
+		Runs every function appended to the same model trigger as one scheduled action.
+		Each run starts a new generation of the action. Offloaded stages are first fetched concurrently
+		on the shared worker pool, within a server session off the event loop. The action is dropped as soon as
+		a newer generation of it exists, so only the newest result gets applied to the document.
+		The action is traced as span 'callback', parent of its 'fetch' and 'transform' stage spans.
+		"""
+		generation = self._action_generations[key] = self._action_generations.get(key, 0) + 1
+		self.last_action = time.time()
+		document = model.document
+		span = self.tracer.start_span(
+			'callback',
+			**self.trace_attributes(document),
+			trigger=self._action_names.get(key),
+			generation=generation,
+		)
+		if document is None or document.session_context is None:
+			try:
+				with self.tracer.activate(span):
+					pending = self.pending_fetches(key)
+					futures = [self.worker_pool.submit(self.traced_stage('fetch', callback)) for callback, _ in pending]
+					fetched = {
+						self._stage_key(callback): (future.result(), signature)
+						for (callback, signature), future in zip(pending, futures)
+					}
+			except BaseException as e:
+				self.tracer.end_span(span, error=e)
+				raise
+			self.apply_callback_chain(document=document, key=key, generation=generation, fetched=fetched, span=span)
+			return
+
+		document.add_next_tick_callback(
+			without_document_lock(partial(self.fetch_callback_chain, document, key, generation, span))
+		)
+
+	def trace_attributes(self, document: Optional[Document]) -> Dict[str, Any]:
+		"""Gets span attributes identifying the session of passed document and this panel."""
+		session_context = document.session_context if document is not None else None
+		return {
+			'session.id': session_context.id if session_context is not None else None,
+			'panel': self.panel_name,
+		}
+
+	def traced_stage(self, phase: str, callback: partial, runner: Optional[Callable] = None) -> Callable[[], Any]:
+		"""Wraps stage to run in a span named after phase, child of the current span,
+		carrying the stage name and the arguments it was appended with.
+
+		Args:
+			phase (str): 'fetch' or 'transform'
+			callback (partial): Stage to run
+			runner (Optional[Callable]): Function running the stage, e.g. run_stage. Defaults to calling it directly.
+
+		Returns:
+			Callable[[], Any]:
+		"""
+		return self.tracer.wrap(
+			partial(runner, callback) if runner is not None else callback,
+			phase,
+			stage=callback.func.__name__,
+			args=list(callback.args) or None,
+			kwargs=callback.keywords or None,
+		)
+
+	@Base.log_call
+	@stage(outputs=['{data_set}'], offload=True)
+	def load_data_set(self, data_set: str, fetch: str) -> Optional[pandas.DataFrame]:
+		"""Fetches data set through passed model fetch method, unless it is already loaded.
+
+		Args:
+			data_set (str): Name of data set attribute
+			fetch (str): Name of fetch method returning the data set
+
+		Returns:
+			Optional[pandas.DataFrame]: None if data set is already loaded
+		"""
+		if getattr(self, data_set).empty:
+			return getattr(self, fetch)()
+
+	@Base.log_call
+	@stage(inputs=['{toggle}.active'], outputs=['{data_set}'], offload=True)
+	def load_toggled_data_set(self, data_set: str, fetch: str, toggle: str) -> Optional[pandas.DataFrame]:
+		"""Fetches data set like load_data_set, but only while passed toggle is active,
+		so chains drawing optional overlays do not query data sets of overlays that are switched off.
+
+		Args:
+			data_set (str): Name of data set attribute
+			fetch (str): Name of fetch method returning the data set
+			toggle (str): Name of toggle attribute showing what the data set feeds
+
+		Returns:
+			Optional[pandas.DataFrame]: None if toggle is off or data set is already loaded
+		"""
+		if getattr(self, toggle).active and getattr(self, data_set).empty:
+			return getattr(self, fetch)()
+
+	async def fetch_callback_chain(
+		self,
+		document: Document,
+		key: Tuple[str, str],
+		generation: int,
+		span: Span,
+	) -> None:
+		if self.is_superseded(key, generation):
+			self.log.info('Dropping action %s generation %d, a newer one was triggered.', key, generation)
+			self.tracer.end_span(span, superseded=True)
+			return
+
+		# Independent fetches run side by side, so the action takes about as long as its slowest query
+		loop = asyncio.get_running_loop()
+		try:
+			with self.tracer.activate(span):
+				pending = self.pending_fetches(key)
+				results = await asyncio.gather(
+					*[loop.run_in_executor(self.worker_pool, self.traced_stage('fetch', callback)) for callback, _ in pending]
+				)
+		except BaseException as e:
+			self.tracer.end_span(span, error=e)
+			raise
+		fetched = {
+			self._stage_key(callback): (result, signature)
+			for (callback, signature), result in zip(pending, results)
+		}
+
+		if self.is_superseded(key, generation):
+			self.log.info('Dropping action %s generation %d, a newer one was triggered.', key, generation)
+			self.tracer.end_span(span, superseded=True)
+			return
+
+		document.add_next_tick_callback(
+			partial(
+			self.apply_callback_chain,
+			document=document,
+			key=key,
+			generation=generation,
+			fetched=fetched,
+			span=span,
+			)
+		)
+
+	def apply_callback_chain(
+		self,
+		document: Optional[Document],
+		key: Tuple[str, str],
+		generation: int,
+		fetched: Optional[Dict[Tuple, Tuple[Any, Tuple]]],
+		span: Optional[Span] = None,
+	) -> None:
+		span = span or self.tracer.start_span('callback', **self.trace_attributes(document))
+		if self.is_superseded(key, generation):
+			self.log.info('Dropping action %s generation %d, a newer one was triggered.', key, generation)
+			self.tracer.end_span(span, superseded=True)
+			return
+
+		try:
+			with (
+				self.tracer.activate(span),
+				self.payload_metrics.action(panel=self.panel_name, action=self._action_names.get(key, str(key))),
+				self.transaction(document),
+			):
+				for callback in self.schedule_callbacks(self._callback_chains[key]):
+					if fetched is None:
+						self.traced_stage('transform', callback, runner=self.run_stage)()
+					elif self._stage_key(callback) in fetched:
+						result, signature = fetched[self._stage_key(callback)]
+						self.commit_stage(callback, result=result, signature=signature)
+					elif not (self._stage_spec(callback) or {}).get('offload'):
+						self.traced_stage('transform', callback, runner=self.run_stage)()
+		except BaseException as e:
+			self.tracer.end_span(span, error=e)
+			raise
+		self.tracer.end_span(span)
 
 	@staticmethod
 	def on_change_decorator(func, *args, **kwargs):
@@ -477,19 +1264,6 @@ class BaseController(Base):
 
 		return wrapped_decorator
 
-	@staticmethod
-	def toggle_renderers_based_on_tag(
-		model: models.Widget,
-		tags: List[str],
-		visible: bool,
-	) -> None:
-		glyphs = [glyph.id for glyph in model.select(tags=tags)]
-
-		for renderer in model.renderers:
-			for reference in renderer.references():
-				if reference.id in glyphs:
-					renderer.visible = visible
-
 	def append_callback(
 		self,
 		model: models.Widget,
@@ -503,6 +1277,7 @@ class BaseController(Base):
 		Append on event or on change handler to passed model,
 		pass function to be executed by handler and *args, **kwargs
 		to be passed to function.
+		All functions appended to the same model trigger run in order within one transaction.
 
 		Args:
 			model (models.Widget): Widget to append handler to
@@ -521,17 +1296,140 @@ class BaseController(Base):
 
 		if event_type is None:
 			assert trigger is not None, f'Could not deduct trigger for passed model:\n{model}'
-			function = self.on_change_decorator(function, *args, **kwargs)
-			model.on_change(trigger, function)
+			key = (model.id, trigger)
 		else:
-			function = self.on_event_decorator(function, *args, **kwargs)
-			model.on_event(event_type, function)
+			key = (model.id, event_type.event_name)
+
+		if key not in self._callback_chains:
+			self._callback_chains[key] = []
+			label = getattr(model, 'label', None) or getattr(model, 'title', None)
+			self._action_names[key] = f"{type(model).__name__}{f'({label!r})' if label else ''}.{key[1]}"
+			if event_type is None:
+				model.on_change(trigger, self.on_change_decorator(self.run_callback_chain, model, key))
+			else:
+				model.on_event(event_type, self.on_event_decorator(self.run_callback_chain, model, key))
+
+		self._callback_chains[key].append(partial(function, *args, **kwargs))
+
+	def append_refresh_callback(self, data_set: str, function: Callable, *args, **kwargs) -> None:
+		"""
+		Append function to be executed whenever a refreshed version of data set is applied
+		through apply_refresh, with *args, **kwargs to be passed to function.
+
+		Args:
+			data_set (str): Name of data set attribute
+			function (Callable): Function to execute
+		"""
+		self._callback_chains.setdefault(('live_refresh', data_set), []).append(partial(function, *args, **kwargs))
+
+	def apply_refresh(self, data_sets: Dict[str, pandas.DataFrame]) -> None:
+		"""Applies refreshed data sets and reruns the stages reading them within one transaction,
+		so the browser receives the changes as patches and streams.
+		Data sets this session never loaded are skipped, it fetches them fresh once they are needed.
+
+		Args:
+			data_sets (Dict[str, pandas.DataFrame]): Refreshed DFs per data set attribute name
+		"""
+		data_sets = {data_set: df for data_set, df in data_sets.items() if not getattr(self, data_set).empty}
+		if not data_sets:
+			return
+
+		self.log.info(f'Applying refreshed data sets: {list(data_sets)}')
+		document = self.panel.document
+		with (
+			self.tracer.span('refresh', **self.trace_attributes(document), data_sets=list(data_sets)),
+			self.payload_metrics.action(panel=self.panel_name, action=f'refresh {list(data_sets)}'),
+			self.transaction(document),
+		):
+			callbacks = []
+			for data_set, df in data_sets.items():
+				setattr(self, data_set, df)
+				callbacks += self._callback_chains.get(('live_refresh', data_set), [])
+			for callback in self.schedule_callbacks(callbacks):
+				self.traced_stage('transform', callback, runner=self.run_stage)()
 
 
 class BaseView(Base):
 
 	def __init__(self, logger_name) -> None:
 		super().__init__(logger_name=logger_name)
+		self._glyph_renderers: Dict[str, models.GlyphRenderer] = {}
+		self._tagged_renderers: Dict[str, List[models.GlyphRenderer]] = {}
+
+	def attach_glyph(
+		self,
+		figure: models.Plot,
+		source: models.ColumnDataSource,
+		glyph: models.Glyph,
+	) -> models.GlyphRenderer:
+		"""Adds glyph to figure unless it is attached already, and registers its renderer under every tag of the glyph,
+		so renderers are looked up by tag without walking the model graph.
+
+		Args:
+			figure (models.Plot): Figure to add glyph to
+			source (models.ColumnDataSource): Source feeding the glyph
+			glyph (models.Glyph): Glyph to add
+
+		Returns:
+			models.GlyphRenderer: Renderer of the glyph
+		"""
+		if glyph.id not in self._glyph_renderers:
+			renderer = figure.add_glyph(source, glyph)
+			self._glyph_renderers[glyph.id] = renderer
+			for tag in glyph.tags:
+				self._tagged_renderers.setdefault(tag, []).append(renderer)
+
+		return self._glyph_renderers[glyph.id]
+
+	def renderers_by_tag(self, tags: List[str]) -> List[models.GlyphRenderer]:
+		return [renderer for tag in tags for renderer in self._tagged_renderers.get(tag, [])]
+
+	def toggle_renderers_based_on_tag(self, tags: List[str], visible: bool) -> None:
+		for renderer in self.renderers_by_tag(tags=tags):
+			renderer.visible = visible
+
+	def link_renderers_visibility(self, toggle: models.Toggle, tags: List[str]) -> models.CustomJS:
+		"""Shows or hides renderers registered under passed tags in the browser whenever toggle flips,
+		without a round trip to the server.
+
+		Args:
+			toggle (models.Toggle): Toggle driving the visibility
+			tags (List[str]): Tags of the glyphs whose renderers to show or hide
+
+		Returns:
+			models.CustomJS: Attached callback
+		"""
+		callback = models.CustomJS(
+			args=dict(renderers=self.renderers_by_tag(tags=tags)),
+			code="""
+			for (const renderer of renderers)
+				renderer.visible = cb_obj.active
+			""",
+		)
+		toggle.js_on_change('active', callback)
+		return callback
+
+	@staticmethod
+	def set_output_backend(figure: models.Plot, parent: models.LayoutDOM, backend: str) -> None:
+		"""Switches the output backend of figure. BokehJS only reads it when it builds the plot view,
+		so a figure already shown is taken out of its parent and put back on the next tick,
+		two separate patches that make the browser rebuild the view with the new backend.
+
+		Args:
+			figure (models.Plot): Figure to switch
+			parent (models.LayoutDOM): Layout holding figure among its children
+			backend (str): 'canvas' or 'webgl'
+		"""
+		if figure.output_backend == backend:
+			return
+		figure.output_backend = backend
+		document = figure.document
+		if document is None:
+			return
+
+		children = list(parent.children)
+		parent.children = [_child for _child in children if _child is not figure]
+		document.add_next_tick_callback(partial(setattr, parent, 'children', children))
 
 	@staticmethod
 	def fit_column_content(content: layouts.column, column_width: int = 300) -> layouts.column:
@@ -545,3 +1443,178 @@ class BaseView(Base):
 				_row.width = column_width
 
 		return content
+
+	@staticmethod
+	def lazy_tabs(panels: List[Callable[[], 'BaseView']], active: int = 0, **kwargs) -> models.Tabs:
+		"""Creates tabs whose panels are only constructed, and their data fetched, when a tab is first activated.
+		Until then each tab holds a lightweight placeholder, so the first render only waits for the active tab.
+
+		Args:
+			panels (List[Callable[[], BaseView]]): Panel classes, each providing a panel_title
+			active (int): Index of the tab constructed right away. Defaults to 0.
+
+		Optional:
+		 **kwargs to be passed to models.Tabs.
+
+		Returns:
+			models.Tabs:
+		"""
+		tabs = models.Tabs(
+			tabs=[models.TabPanel(title=panel.panel_title, child=models.Div(text='Loading...')) for panel in panels],
+			active=active,
+			**kwargs,
+		)
+		built: Dict[int, BaseView] = {}
+
+		def build(index: int) -> None:
+			if index in built:
+				return
+			with PayloadMetrics.shared().action(panel=panels[index].panel_title, action='build'):
+				built[index] = panels[index]()
+				tabs.tabs[index] = built[index].panel
+
+		build(active)
+		tabs.on_change('active', lambda attr, old, new: build(new))
+		return tabs
+
+	@staticmethod
+	def sync_data_source(
+		source: models.ColumnDataSource,
+		data: Union[pandas.DataFrame, Dict[str, numpy.ndarray]],
+	) -> str:
+		"""Brings source to the passed data while sending the browser only what it does not have yet.
+		Changed cells of existing rows are sent as one patch slice per column, appended rows as a stream,
+		and the columns are only replaced wholesale when the column set, a dtype or the row count shrinks.
+
+		Args:
+			source (models.ColumnDataSource): Source to update
+			data (Union[pandas.DataFrame, Dict[str, numpy.ndarray]]): New columns, a DF is sent without its index
+
+		Returns:
+			str: Update sent, one of 'unchanged', 'patch', 'stream', 'patch+stream' or 'replace'
+		"""
+		if isinstance(data, pandas.DataFrame):
+			data = data.to_dict(orient='series')
+		# Own copies, patches later write into these arrays in place
+		data = {column: numpy.array(values) for column, values in data.items()}
+		current = {column: numpy.asarray(values) for column, values in source.data.items()}
+		old_length = len(next(iter(current.values()))) if current else 0
+		new_length = len(next(iter(data.values()))) if data else 0
+
+		if (
+			old_length == 0 or new_length < old_length or current.keys() != data.keys()
+			or any(current[column].dtype != values.dtype for column, values in data.items())
+		):
+			source.data = data
+			return 'replace'
+
+		patches = {}
+		for column, values in data.items():
+			old, new = current[column], values[:old_length]
+			changed = numpy.flatnonzero(~((old == new) | (pandas.isna(old) & pandas.isna(new))))
+			if len(changed) > 0:
+				_rows = slice(int(changed[0]), int(changed[-1]) + 1)
+				patches[column] = [(_rows, new[_rows])]
+		if patches:
+			source.patch(patches)
+		if new_length > old_length:
+			source.stream({column: values[old_length:] for column, values in data.items()})
+
+		return '+'.join(
+			[_update for _update, _sent in [('patch', bool(patches)), ('stream', new_length > old_length)] if _sent]
+		) or 'unchanged'
+
+	@staticmethod
+	def autoscale_y_range(
+		figure: models.Plot,
+		source: models.ColumnDataSource,
+		low_fields: List[str],
+		high_fields: List[str],
+		x_field: str = 'index',
+	) -> models.CustomJS:
+		"""Rescales y range of passed figure in the browser whenever its x range or the source data changes,
+		including patches and streams sent by sync_data_source.
+		A min/max segment tree over the source rows is built once per data change, so every rescale
+		is a binary search for the visible rows plus an O(log n) range query.
+
+		Args:
+			figure (models.Plot): Figure whose y range to rescale
+			source (models.ColumnDataSource): Source holding the plotted data, sorted by x_field
+			low_fields (List[str]): Columns whose minimum defines the y range start
+			high_fields (List[str]): Columns whose maximum defines the y range end
+			x_field (str): Column holding the x coordinate of each row. Defaults to 'index'.
+
+		Returns:
+			models.CustomJS: Attached callback
+		"""
+		callback = models.CustomJS(
+			args=dict(
+			source=source,
+			x_range=figure.x_range,
+			y_range=figure.y_range,
+			low_fields=low_fields,
+			high_fields=high_fields,
+			x_field=x_field,
+			),
+			code="""
+			const n = source.get_length() ?? 0
+			if (n == 0)
+				return
+
+			let tree = y_range._autoscale_tree
+			if (tree == null || tree.n != n || cb_obj === source) {
+				const min = new Float64Array(2 * n).fill(Infinity)
+				const max = new Float64Array(2 * n).fill(-Infinity)
+				for (const field of low_fields) {
+					const values = source.data[field]
+					for (let i = 0; i < n; i++)
+						if (values[i] < min[n + i]) min[n + i] = values[i]
+				}
+				for (const field of high_fields) {
+					const values = source.data[field]
+					for (let i = 0; i < n; i++)
+						if (values[i] > max[n + i]) max[n + i] = values[i]
+				}
+				for (let i = n - 1; i > 0; i--) {
+					min[i] = Math.min(min[2 * i], min[2 * i + 1])
+					max[i] = Math.max(max[2 * i], max[2 * i + 1])
+				}
+				tree = y_range._autoscale_tree = {n, min, max}
+			}
+
+			const xs = source.data[x_field]
+			const bisect = (value, right) => {
+				let lo = 0, hi = n
+				while (lo < hi) {
+					const mid = (lo + hi) >> 1
+					if (xs[mid] < value || (right && xs[mid] == value)) lo = mid + 1
+					else hi = mid
+				}
+				return lo
+			}
+
+			let l = bisect(x_range.start, false) + n
+			let r = bisect(x_range.end, true) + n
+			let start = Infinity, end = -Infinity
+			while (l < r) {
+				if (l & 1) {
+					start = Math.min(start, tree.min[l])
+					end = Math.max(end, tree.max[l++])
+				}
+				if (r & 1) {
+					start = Math.min(start, tree.min[--r])
+					end = Math.max(end, tree.max[r])
+				}
+				l >>= 1
+				r >>= 1
+			}
+			if (isFinite(start) && isFinite(end))
+				y_range.setv({start: start, end: end})
+			""",
+		)
+		figure.x_range.js_on_change('start', callback)
+		figure.x_range.js_on_change('end', callback)
+		source.js_on_change('data', callback)
+		source.js_on_change('patching', callback)
+		source.js_on_change('streaming', callback)
+		return callback
@@ -1,5 +1,5 @@
 from .base import BaseView, BaseController, BaseModel
-from bokeh import models, plotting, events
+from bokeh import models, plotting
 from bokeh.layouts import gridplot, column, row
 import pandas
 from typing import List
@@ -152,6 +152,7 @@ class CompanyFinancialsModel(BaseModel):
 	@financial_data_set.setter
 	def financial_data_set(self, df: pandas.DataFrame) -> None:
 		self._financial_data_set = df
+		self.bump_data_set_version('financial_data_set')
 
 	@property
 	def financial_data_view(self) -> pandas.DataFrame:
@@ -179,26 +180,37 @@ class CompanyFinancialsModel(BaseModel):
 
 
 class CompanyFinancials(CompanyFinancialsView, CompanyFinancialsModel, BaseController):
+	panel_title = 'Company Financials'
 
 	def __init__(self,) -> None:
 		super().__init__(
 			logger_name=__name__,
 			chart_width=16 * 80,
 			chart_height=9 * 80,
-			panel_title='Company Financials',
+			panel_title=self.panel_title,
 		)
 
 		self.available_symbols = self.fetch_available_symbols_company_financials()
 		self.company_selector.options = self.available_symbols
 		self.company_selector.value = self.company_selector.options[0]
 		self.append_callback(model=self.financial_statement_selector, function=self.update_available_kpis)
+		self.append_callback(model=self.calculation_button, function=self.load_financial_data)
 		self.append_callback(model=self.calculation_button, function=self.update_figure)
-		self.append_callback(model=self.calculation_button, function=self.update_view_range, set_full=True) #Yapf:disable
-		self.append_callback(model=self.financials_chart, function=self.update_view_range, event_type=events.MouseWheel)  # yapf: disable
+		self.append_callback(model=self.calculation_button, function=self.update_view_range)
+		self.autoscale_y_range(
+			figure=self.financials_chart,
+			source=self.financial_cds,
+			low_fields=['top', 'bottom'],
+			high_fields=['top'],
+		)
 
 		self.update_available_kpis()
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['periodicity_selector.value', 'financial_statement_selector.value'],
+		outputs=['available_kpis'],
+	)
 	def update_available_kpis(self):
 		#Update model
 		self.available_kpis = self.fetch_available_kpis_company_financials(
@@ -225,17 +237,32 @@ class CompanyFinancials(CompanyFinancialsView, CompanyFinancialsModel, BaseContr
 		self.financial_kpi_selector.value = self.financial_kpi_selector.options[0]
 
 	@BaseController.log_call
-	def update_figure(self):
-		#Update model
-		self.financial_data_set = self.fetch_financial_kpi(
+	@BaseController.stage(
+		inputs=[
+		'financial_kpi_selector.value',
+		'periodicity_selector.value',
+		'financial_statement_selector.value',
+		],
+		outputs=['financial_data_set'],
+		offload=True,
+	)
+	def load_financial_data(self):
+		return self.fetch_financial_kpi(
 			kpis=[self.financial_kpi_selector.value],
 			periodcity=self.periodicity_selector.value,
 			statement=self.financial_statement_selector.value,
 		)
 
-		self.financial_data_view = self.financial_data_set
+	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['company_selector.value'],
+		data_inputs=['financial_data_set'],
+		outputs=['financial_data_view'],
+	)
+	def update_figure(self):
+		#Update model
 		self.financial_data_view = self.filter_data_frame(
-			self.financial_data_view,
+			data_set='financial_data_set',
 			column='symbol',
 			value=self.company_selector.value,
 		)
@@ -246,7 +273,7 @@ class CompanyFinancials(CompanyFinancialsView, CompanyFinancialsModel, BaseContr
 		self.financial_data_view = self.financial_data_view.sort_values(by=['calendar_year', 'period'])
 		self.financial_data_view = self.financial_data_view.reset_index()
 		self.financial_data_view['index'] = self.financial_data_view.index
-		self.financial_cds.data.update(self.financial_data_view)
+		self.sync_data_source(source=self.financial_cds, data=self.financial_data_view)
 
 		self.financial_data_view['x_axis_label'] = \
    self.financial_data_view['period'] + \
@@ -254,29 +281,14 @@ class CompanyFinancials(CompanyFinancialsView, CompanyFinancialsModel, BaseContr
    self.financial_data_view['calendar_year'].astype(str)
 
 		#Update view
-		if len(self.financials_chart.select({'id': self.vbar_glyph.id})) == 0:
-			self.financials_chart.add_glyph(self.financial_cds, self.vbar_glyph)
+		self.attach_glyph(figure=self.financials_chart, source=self.financial_cds, glyph=self.vbar_glyph)
 
 		self.financials_chart.xaxis.major_label_overrides = self.financial_data_view[
 			'x_axis_label'].astype(str).to_dict()
 
-	def update_view_range(self, set_full=False):
+	def update_view_range(self):
 		_df = self.financial_data_view
 
-		#X-axis
-		if set_full:
-			self.financials_chart.x_range.end = _x_range_max = _df.index.max() + 1
-			self.financials_chart.x_range.start = _x_range_min = -1
-		else:
-			_x_range_min = self.financials_chart.x_range.start
-			_x_range_max = self.financials_chart.x_range.end
-
-		#Y-axis
-		_mask = (_df.index >= _x_range_min) & (_df.index <= _x_range_max)
-		_max_value = _df.loc[_mask]['top'].max()
-		if _df.loc[_mask]['top'].min() < 0:
-			_min_value = _df.loc[_mask]['top'].min()
-		else:
-			_min_value = 0
-		self.financials_chart.y_range.start = _min_value
-		self.financials_chart.y_range.end = _max_value
+		#X-axis, y-axis follows in the browser through autoscale_y_range
+		self.financials_chart.x_range.end = _df.index.max() + 1
+		self.financials_chart.x_range.start = -1
@@ -148,6 +148,7 @@ class EarningsCalendarModel(BaseModel):
 	@earnings_data_set.setter
 	def earnings_data_set(self, df):
 		self._earnings_data_set = df
+		self.bump_data_set_version('earnings_data_set')
 
 	@property
 	def constituents_data_view(self):
@@ -167,45 +168,53 @@ class EarningsCalendarModel(BaseModel):
 	@constituents_data_set.setter
 	def constituents_data_set(self, df):
 		self._constituents_data_set = df
+		self.bump_data_set_version('constituents_data_set')
 
 
 class EarningsCalendar(EarningsCalendarView, EarningsCalendarModel, BaseController):
+	panel_title = 'Earnings Calendar'
 
 	def __init__(self) -> None:
 		super().__init__(
 			logger_name=__name__,
 			chart_width=16 * 60,
 			chart_height=9 * 60,
-			panel_title='Earnings Calendar',
+			panel_title=self.panel_title,
 		)
 		self.available_indices_data_set = self.fetch_available_index_constituents()
 
 		self.index_selector.options = self.available_indices_data_set['common_name'].tolist()
 		self.index_selector.value = self.index_selector.options[0]
 
+		self.append_callback(model=self.index_selector, function=self.load_data_set, data_set='constituents_data_set', fetch='fetch_index_constituents') # Yapf:disable
 		self.append_callback(model=self.index_selector, function=self.update_constituents_data)
 		self.append_callback(model=self.index_selector, function=self.update_number_of_companies_input)
+		self.append_callback(model=self.update_table_button, function=self.load_data_set, data_set='constituents_data_set', fetch='fetch_index_constituents') # Yapf:disable
 		self.append_callback(model=self.update_table_button, function=self.update_constituents_data)
+		self.append_callback(model=self.update_table_button, function=self.load_data_set, data_set='earnings_data_set', fetch='fetch_earnings_calendar') # Yapf:disable
 		self.append_callback(model=self.update_table_button, function=self.update_earnings_data)
 		self.append_callback(model=self.update_table_button, function=self.update_table)
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['index_selector.value'],
+		data_inputs=['constituents_data_set'],
+		outputs=['constituents_data_view'],
+	)
 	def update_constituents_data(self):
-		if self.constituents_data_set.empty:
-			self.constituents_data_set = self.fetch_index_constituents()
-
-		self.constituents_data_view = self.constituents_data_set
 		self.constituents_data_view = self.filter_data_frame(
-			self.constituents_data_view,
+			data_set='constituents_data_set',
 			column='common_index_name',
 			value=self.index_selector.value,
 		)
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['number_of_companies_input.value'],
+		data_inputs=['earnings_data_set', 'constituents_data_view'],
+		outputs=['earnings_data_view'],
+	)
 	def update_earnings_data(self):
-		if self.earnings_data_set.empty:
-			self.earnings_data_set = self.fetch_earnings_calendar()
-
 		self.earnings_data_view = self.earnings_data_set
 		self.earnings_data_view = pandas.merge(
 			left=self.earnings_data_view,
@@ -224,9 +233,10 @@ class EarningsCalendar(EarningsCalendarView, EarningsCalendarModel, BaseControll
 		self.earnings_data_view = self.earnings_data_view.head(self.number_of_companies_input.value)
 
 	@BaseController.log_call
+	@BaseController.stage(data_inputs=['earnings_data_view'])
 	def update_table(self):
 		#Update model components
-		self.cds.data = self.earnings_data_view
+		self.sync_data_source(source=self.cds, data=self.earnings_data_view)
 		self.columns = self.earnings_data_view
 
 		#Update view components
@@ -234,6 +244,7 @@ class EarningsCalendar(EarningsCalendarView, EarningsCalendarModel, BaseControll
 		self.table.source = self.cds
 
 	@BaseController.log_call
+	@BaseController.stage(data_inputs=['constituents_data_view'])
 	def update_number_of_companies_input(self):
 		#Update view components
 		self.number_of_companies_input.value = len(self.constituents_data_view)
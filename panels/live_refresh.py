@@ -0,0 +1,105 @@
+from .base import BaseModel, BaseController
+from tornado.ioloop import PeriodicCallback
+from typing import List, Dict, Tuple, Set, Optional
+from functools import partial
+import asyncio
+import pandas
+import weakref
+import os
+
+
+class LiveRefresh(BaseModel):
+	"""
+	Server wide poller keeping portfolio data sets of all sessions up to date.
+	One poll costs a single information_schema lookup of the modification times of all watched tables,
+	reading no table rows, no matter how many sessions are subscribed. Data sets built from a changed table are fetched once and handed to every subscribed session,
+	which applies them as CDS patches and streams.
+	"""
+	# Refreshes must bypass the cache, the fetched result still replaces the cached one for new sessions
+	read_cache = False
+	_shared: 'LiveRefresh' = None
+
+	def __init__(self) -> None:
+		super().__init__(logger_name=__name__)
+		self._period_milliseconds = int(os.getenv('LIVE_REFRESH_PERIOD_MS', '15000'))
+		self._periodic_callback: PeriodicCallback = None
+		self._update_times: Dict[str, Optional[pandas.Timestamp]] = {}
+		self._tables: Dict[Tuple[str, str], List[str]] = {}
+		self._subscribers: Dict[Tuple[str, str], weakref.WeakSet] = {}
+
+	@classmethod
+	def shared(cls) -> 'LiveRefresh':
+		if cls._shared is None:
+			cls._shared = cls()
+		return cls._shared
+
+	def subscribe(self, subscriber: BaseController, data_set: str, fetch: str, tables: List[str]) -> None:
+		"""Subscribes controller to refreshed versions of data set, delivered through its apply_refresh.
+		Subscribers are held weakly, so destroyed sessions drop out on their own.
+
+		Args:
+			subscriber (BaseController): Controller holding the data set
+			data_set (str): Name of data set attribute
+			fetch (str): Name of fetch method returning the data set
+			tables (List[str]): Fully qualified source tables of the data set
+		"""
+		self._tables[(data_set, fetch)] = tables
+		self._subscribers.setdefault((data_set, fetch), weakref.WeakSet()).add(subscriber)
+		self.start()
+
+	def start(self) -> None:
+		"""Starts polling on the running server loop, unless it is already polling or no loop is running."""
+		if self._periodic_callback is not None:
+			return
+		try:
+			asyncio.get_running_loop()
+		except RuntimeError:
+			return
+
+		self._periodic_callback = PeriodicCallback(self.poll, self._period_milliseconds)
+		self._periodic_callback.start()
+		self.log.info('Polling source tables every %d ms.', self._period_milliseconds)
+
+	def watched_tables(self) -> Set[str]:
+		return {
+			table for data_set, tables in self._tables.items() if len(self._subscribers[data_set]) > 0
+			for table in tables
+		}
+
+	async def poll(self) -> None:
+		tables = self.watched_tables()
+		if not tables:
+			return
+
+		loop = asyncio.get_running_loop()
+		update_times = await loop.run_in_executor(self.worker_pool, self.fetch_table_update_times, sorted(tables))
+		changed = {
+			table for table, update_time in update_times.items()
+			if self._update_times.get(table, update_time) != update_time
+		}
+		self._update_times.update(update_times)
+		if not changed:
+			return
+
+		self.log.info('Source tables changed: %s', sorted(changed))
+		refreshes = [
+			(data_set, fetch) for (data_set, fetch), tables in self._tables.items()
+			if changed.intersection(tables) and len(self._subscribers[(data_set, fetch)]) > 0
+		]
+		results = await asyncio.gather(
+			*[loop.run_in_executor(self.worker_pool, getattr(self, fetch)) for _, fetch in refreshes]
+		)
+
+		# Group per session, so each one reruns its stages once for all of its refreshed data sets
+		deliveries: Dict[BaseController, Dict] = {}
+		for (data_set, fetch), df in zip(refreshes, results):
+			if df.empty:
+				continue
+			for subscriber in list(self._subscribers[(data_set, fetch)]):
+				deliveries.setdefault(subscriber, {})[data_set] = self.copy_data_set(df)
+
+		for subscriber, data_sets in deliveries.items():
+			document = subscriber.panel.document
+			if document is None:
+				continue
+			document.add_next_tick_callback(partial(subscriber.apply_refresh, data_sets=data_sets))
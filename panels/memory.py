@@ -0,0 +1,190 @@
+from .base import Base, BaseController, BaseModel
+from bokeh import models
+from tornado.ioloop import PeriodicCallback
+from typing import List, Dict, Tuple, Any
+import pandas
+import numpy
+import time
+import sys
+import os
+
+
+class MemoryAccounting(Base):
+	"""
+	Server wide account of the memory held per session and panel: DataFrames, arrays, derived views,
+	partition indexes and ColumnDataSources of every live controller.
+	Session frames are copy on write views of the shared data set registry until changed, so columns still sharing
+	memory with the registry are accounted as shared_bytes, and the registry itself once for the whole process.
+	With MEMORY_BUDGET_MB set, the budget is checked every MEMORY_CHECK_PERIOD_MS. Above it, sessions idle
+	for at least MEMORY_IDLE_SECONDS drop their derived views and partition indexes, longest idle first,
+	until the process is back within budget. Both are rebuilt on their next use.
+	"""
+	_shared: 'MemoryAccounting' = None
+
+	def __init__(self) -> None:
+		super().__init__(logger_name=__name__)
+		budget = os.getenv('MEMORY_BUDGET_MB')
+		self.budget = int(float(budget) * 1024**2) if budget else None
+		self.idle_seconds = float(os.getenv('MEMORY_IDLE_SECONDS', '300'))
+		self.period_milliseconds = int(os.getenv('MEMORY_CHECK_PERIOD_MS', '60000'))
+		self._periodic_callback: PeriodicCallback = None
+
+	@classmethod
+	def shared(cls) -> 'MemoryAccounting':
+		if cls._shared is None:
+			cls._shared = cls()
+		return cls._shared
+
+	def start(self) -> None:
+		"""Checks the budget periodically on the server loop, unless no budget is set or it is checked already."""
+		if self.budget is None or self._periodic_callback is not None:
+			return
+		self._periodic_callback = PeriodicCallback(self.enforce_budget, self.period_milliseconds)
+		self._periodic_callback.start()
+		self.log.info('Checking memory budget of %.1f MB every %d ms.', self.budget / 1024**2, self.period_milliseconds)
+
+	@staticmethod
+	def registry_arrays() -> List[numpy.ndarray]:
+		with BaseModel._in_flight_lock:
+			frames = [_shared[0] for _shared in BaseModel._shared_data_sets.values()]
+		return [df.iloc[:, position].to_numpy() for df in frames for position in range(df.shape[1])]
+
+	@staticmethod
+	def size_of(value: Any, registry_arrays: List[numpy.ndarray]) -> Tuple[int, int]:
+		"""Estimates memory held by value, recursing into containers and ColumnDataSource data.
+
+		Args:
+			value (Any): Object to measure
+			registry_arrays (List[numpy.ndarray]): Column arrays of the shared data set registry
+
+		Returns:
+			Tuple[int, int]: Bytes held by value alone and bytes shared with the registry
+		"""
+		size_of = MemoryAccounting.size_of
+		if isinstance(value, pandas.DataFrame):
+			owned, shared = int(value.index.memory_usage(deep=True)), 0
+			for position, size in enumerate(value.memory_usage(deep=True, index=False).to_numpy()):
+				array = value.iloc[:, position].to_numpy()
+				if any(numpy.may_share_memory(array, _array) for _array in registry_arrays):
+					shared += int(size)
+				else:
+					owned += int(size)
+			return owned, shared
+		if isinstance(value, pandas.Series):
+			return size_of(value.to_frame(), registry_arrays)
+		if isinstance(value, numpy.ndarray):
+			if value.dtype == object and value.ndim == 1:
+				return int(pandas.Series(value, copy=False).memory_usage(deep=True, index=False)), 0
+			return value.nbytes, 0
+		if isinstance(value, models.ColumnDataSource):
+			return size_of(dict(value.data), registry_arrays)
+		if isinstance(value, (dict, list, tuple, set)):
+			items = [_item for _pair in value.items() for _item in _pair] if isinstance(value, dict) else value
+			sizes = [size_of(_item, registry_arrays) for _item in items]
+			return sys.getsizeof(value) + sum(_owned for _owned, _ in sizes), sum(_shared for _, _shared in sizes)
+		return sys.getsizeof(value), 0
+
+	def panel_usage(self, controller: BaseController, registry_arrays: List[numpy.ndarray]) -> Dict[str, Any]:
+		"""Gets memory held by the data attributes of controller.
+
+		Returns:
+			Dict[str, Any]: Totals and bytes per attribute
+		"""
+		attributes = {}
+		for name, value in list(vars(controller).items()):
+			if name in ['_derived_views', '_partition_indexes'] or isinstance(
+				value, (pandas.DataFrame, pandas.Series, numpy.ndarray, models.ColumnDataSource)
+			):
+				owned, shared = self.size_of(value, registry_arrays)
+				attributes[name.lstrip('_')] = {'bytes': owned, 'shared_bytes': shared}
+		return {
+			'bytes': sum(_size['bytes'] for _size in attributes.values()),
+			'shared_bytes': sum(_size['shared_bytes'] for _size in attributes.values()),
+			'cached_view_bytes': sum(
+			attributes[_name]['bytes'] for _name in ['derived_views', 'partition_indexes', *controller.stage_views()]
+			),
+			'idle_seconds': time.time() - controller.last_action,
+			'attributes': dict(sorted(attributes.items(), key=lambda _item: _item[1]['bytes'], reverse=True)),
+		}
+
+	@staticmethod
+	def holds_cached_views(controller: BaseController) -> bool:
+		return bool(controller._derived_views or controller._partition_indexes) or any(
+			not getattr(controller, _view).empty for _view in controller.stage_views()
+		)
+
+	def sessions(self) -> Dict[str, List[BaseController]]:
+		"""Gets live controllers per session id."""
+		sessions = {}
+		for controller in BaseController.live_controllers():
+			panel = getattr(controller, 'panel', None)
+			session_id = controller.trace_attributes(panel.document if panel is not None else None)['session.id']
+			sessions.setdefault(session_id or 'none', []).append(controller)
+		return sessions
+
+	def report(self, sessions: Dict[str, List[BaseController]] = None) -> Dict[str, Any]:
+		"""Gets memory held per session and panel, the shared registry and the process total compared to the budget.
+
+		Args:
+			sessions (Dict[str, List[BaseController]]): Controllers per session id to report on. Defaults to all live ones.
+
+		Returns:
+			Dict[str, Any]:
+		"""
+		registry_arrays = self.registry_arrays()
+		registry = BaseModel.shared_data_sets()
+		usage = {}
+		for session_id, controllers in (sessions if sessions is not None else self.sessions()).items():
+			panels = {_controller.panel_name: self.panel_usage(_controller, registry_arrays) for _controller in controllers}
+			usage[session_id] = {
+				'bytes': sum(_panel['bytes'] for _panel in panels.values()),
+				'shared_bytes': sum(_panel['shared_bytes'] for _panel in panels.values()),
+				'idle_seconds': min(_panel['idle_seconds'] for _panel in panels.values()),
+				'panels': panels,
+			}
+
+		registry_bytes = sum(_size for _size, _ in registry.values())
+		return {
+			'total_bytes': registry_bytes + sum(_session['bytes'] for _session in usage.values()),
+			'budget_bytes': self.budget,
+			'idle_seconds': self.idle_seconds,
+			'registry': {'bytes': registry_bytes, 'data_sets': len(registry)},
+			'sessions': dict(sorted(usage.items(), key=lambda _item: _item[1]['bytes'], reverse=True)),
+		}
+
+	def enforce_budget(self) -> None:
+		"""Drops cached views and the data views written by stages of idle sessions, longest idle first,
+		while the process is above budget. Both are rebuilt by the next action needing them."""
+		if self.budget is None:
+			return
+		# One snapshot, sessions created meanwhile are neither reported nor considered
+		snapshot = self.sessions()
+		report = self.report(sessions=snapshot)
+		total = report['total_bytes']
+		if total <= self.budget:
+			return
+
+		# Only idle sessions still holding cached views can give memory back
+		sessions = {
+			_id: _controllers
+			for _id, _controllers in snapshot.items()
+			if report['sessions'][_id]['idle_seconds'] >= self.idle_seconds
+			and any(self.holds_cached_views(_controller) for _controller in _controllers)
+		}
+		if not sessions:
+			self.log.debug('Accounted memory of %.1f MB exceeds budget, no idle session holds cached views.', total / 1024**2)
+			return
+
+		self.log.warning(
+			'Accounted memory of %.1f MB exceeds budget of %.1f MB, dropping cached views of idle sessions.',
+			total / 1024**2,
+			self.budget / 1024**2,
+		)
+		for session_id in sorted(sessions, key=lambda _id: report['sessions'][_id]['idle_seconds'], reverse=True):
+			for controller in sessions[session_id]:
+				controller.drop_cached_views()
+				controller.drop_stage_views()
+				total -= report['sessions'][session_id]['panels'][controller.panel_name]['cached_view_bytes']
+			self.log.info('Dropped cached views of idle session %s, %.1f MB accounted.', session_id, total / 1024**2)
+			if total <= self.budget:
+				return
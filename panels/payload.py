@@ -0,0 +1,176 @@
+from bokeh.core.json_encoder import serialize_json
+from bokeh.core.serialization import Serializer
+from bokeh.document import Document
+from bokeh.document.events import (
+	ColumnDataChangedEvent,
+	ColumnsPatchedEvent,
+	ColumnsStreamedEvent,
+	DocumentPatchedEvent,
+	ModelChangedEvent,
+)
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+import copy
+import os
+import threading
+import time
+from ..helpers.helpers import Helpers
+
+
+class PayloadMetrics:
+	"""
+	Server wide account of the document patches sent to browsers, per panel and action.
+	Every patch event of a watched document is serialized the way a PATCH-DOC message serializes it,
+	counting one message per event, its JSON and binary buffer bytes per model and property,
+	and the time serializing it took. Events are attributed to the action running when they are released.
+	Serializing twice doubles that cost, so documents are only watched while PAYLOAD_METRICS is set.
+	"""
+	_shared: 'PayloadMetrics' = None
+	_current: ContextVar[Optional[Dict[str, Any]]] = ContextVar('current_action', default=None)
+
+	def __init__(self) -> None:
+		self.enabled = bool(os.getenv('PAYLOAD_METRICS'))
+		self.log = Helpers().get_logger(__name__)
+		self._lock = threading.Lock()
+		self._actions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+	@classmethod
+	def shared(cls) -> 'PayloadMetrics':
+		if cls._shared is None:
+			cls._shared = cls()
+		return cls._shared
+
+	def watch(self, document: Document) -> None:
+		"""Measures every patch of document sent to the browser.
+		Has to be called while the document is built, before its session subscribes to it, as the session
+		marks models it sent as synced and later serializations only reference them.
+
+		Args:
+			document (Document): Document to watch
+		"""
+		if self.enabled:
+			document.on_change(self.measure)
+
+	@staticmethod
+	def empty_record() -> Dict[str, Any]:
+		return {'messages': 0, 'bytes': 0, 'buffer_bytes': 0, 'serialization_seconds': 0.0, 'properties': {}}
+
+	@staticmethod
+	def property_name(event: DocumentPatchedEvent) -> str:
+		"""Names the model type, its name if set, and the property an event patches, e.g. 'DataTable.columns'."""
+		if isinstance(event, ModelChangedEvent):
+			attr = event.attr
+		elif isinstance(event, ColumnDataChangedEvent):
+			attr = 'data'
+		elif isinstance(event, ColumnsStreamedEvent):
+			attr = 'stream'
+		elif isinstance(event, ColumnsPatchedEvent):
+			attr = 'patch'
+		else:
+			return type(event).__name__
+
+		model = event.model
+		return f'{type(model).__name__}({model.name}).{attr}' if model.name else f'{type(model).__name__}.{attr}'
+
+	def measure(self, event) -> None:
+		# Changes made by the browser are not sent back to it
+		if not isinstance(event, DocumentPatchedEvent) or event.setter is not None:
+			return
+
+		start = time.perf_counter()
+		serializer = Serializer(references=event.document.models.synced_references)
+		content = serialize_json({'events': serializer.encode([event])})
+		elapsed = time.perf_counter() - start
+		size = len(content.encode('utf-8'))
+		buffer_size = sum(memoryview(buffer.data).nbytes for buffer in serializer.buffers)
+
+		record = self._current.get()
+		if record is None:
+			record = self.empty_record()
+			self.add(record, event=event, size=size, buffer_size=buffer_size, elapsed=elapsed)
+			self.commit(panel='Document', action='unattributed', record=record)
+		else:
+			self.add(record, event=event, size=size, buffer_size=buffer_size, elapsed=elapsed)
+
+	def add(
+		self,
+		record: Dict[str, Any],
+		event: DocumentPatchedEvent,
+		size: int,
+		buffer_size: int,
+		elapsed: float,
+	) -> None:
+		record['messages'] += 1
+		record['bytes'] += size
+		record['buffer_bytes'] += buffer_size
+		record['serialization_seconds'] += elapsed
+		patched = record['properties'].setdefault(self.property_name(event), {'messages': 0, 'bytes': 0})
+		patched['messages'] += 1
+		patched['bytes'] += size + buffer_size
+
+	@contextmanager
+	def action(self, panel: str, action: str):
+		"""Attributes patches released within the block to passed action of panel. Nested actions join the outer one.
+
+		Args:
+			panel (str): Title of the panel running the action
+			action (str): Name of the action, e.g. "Button('Update').button_click"
+		"""
+		if not self.enabled or self._current.get() is not None:
+			yield
+			return
+
+		record = self.empty_record()
+		token = self._current.set(record)
+		try:
+			yield
+		finally:
+			self._current.reset(token)
+			self.commit(panel=panel, action=action, record=record)
+
+	def commit(self, panel: str, action: str, record: Dict[str, Any]) -> None:
+		"""Adds the patches of one run of action to its totals."""
+		if record['messages'] == 0:
+			return
+
+		self.log.debug(
+			'%s %s: %d messages, %d B JSON and %d B buffers, serialized in %.1f ms',
+			panel,
+			action,
+			record['messages'],
+			record['bytes'],
+			record['buffer_bytes'],
+			record['serialization_seconds'] * 1000,
+		)
+		with self._lock:
+			totals = self._actions.setdefault((panel, action), {'runs': 0, 'max_bytes': 0, **self.empty_record()})
+			totals['runs'] += 1
+			totals['max_bytes'] = max(totals['max_bytes'], record['bytes'] + record['buffer_bytes'])
+			for key in ['messages', 'bytes', 'buffer_bytes', 'serialization_seconds']:
+				totals[key] += record[key]
+			for name, patched in record['properties'].items():
+				total = totals['properties'].setdefault(name, {'messages': 0, 'bytes': 0})
+				total['messages'] += patched['messages']
+				total['bytes'] += patched['bytes']
+
+	def report(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+		"""Gets totals per panel and action, with properties ordered by bytes sent.
+
+		Returns:
+			Dict[str, Dict[str, Dict[str, Any]]]: Totals per action per panel
+		"""
+		with self._lock:
+			actions = copy.deepcopy(self._actions)
+
+		report = {}
+		for (panel, action), totals in sorted(actions.items()):
+			totals['properties'] = dict(
+				sorted(totals['properties'].items(), key=lambda _item: _item[1]['bytes'], reverse=True)
+			)
+			report.setdefault(panel, {})[action] = totals
+		return report
+
+	def reset(self) -> None:
+		with self._lock:
+			self._actions = {}
@@ -1,9 +1,10 @@
 from .base import BaseView, BaseController, BaseModel
-from bokeh import models, events, plotting, palettes
+from .live_refresh import LiveRefresh
+from bokeh import models, plotting, palettes
 from bokeh.layouts import gridplot, column, row
 import pandas
 import numpy
-from typing import List, Dict
+from typing import List, Dict, Any
 from typing import Callable
 
 
@@ -17,8 +18,11 @@ class PortfolioView(BaseView):
 		sector_table_width,
 		sector_table_height,
 		panel_title,
+		webgl_bar_threshold,
 	) -> None:
 		super().__init__(logger_name=logger_name)
+		self._webgl_bar_threshold = webgl_bar_threshold
+
 		#Tools
 		self._sector_exposure_hover_tool = models.HoverTool()
 		self._country_exposure_hover_tool = models.HoverTool()
@@ -33,6 +37,7 @@ class PortfolioView(BaseView):
 			background_fill_alpha=0.5,
 			x_range=[0, 1],
 			y_range=[0, 1],
+			output_backend='canvas',
 		)
 		self.instrument_plot.yaxis.major_label_text_color = "white"
 		self.instrument_plot.xaxis.major_label_text_color = "white"
@@ -130,10 +135,11 @@ class PortfolioView(BaseView):
 			self.positions_scale_toggle,
 			)
 		)
+		self._instrument_plot_row = row(self.instrument_plot)
 		_plots_column = self.fit_column_content(
 			column_width=instrument_plot_width,
 			content=column(
-			row(self.instrument_plot),
+			self.instrument_plot_row,
 			row(self.instrument_exposure_chart, self.country_exposure_chart),
 			row(self.sector_exposure_chart),
 			)
@@ -156,6 +162,17 @@ class PortfolioView(BaseView):
 			title=panel_title,
 		)
 
+		#Transforms
+		self._direction_color_mapper = models.LinearColorMapper(
+			palette=['red', 'gray', 'green'],
+			low=-1,
+			high=1,
+		)
+		self._direction_marker_transform = models.CustomJSTransform(
+			func='return x > 0 ? "triangle" : "inverted_triangle"',
+			v_func='return Array.from(xs, (x) => x > 0 ? "triangle" : "inverted_triangle")',
+		)
+
 		#Glyphs
 		self._instrument_exposure_vbar_glyph = models.VBar(
 			width=0.9,
@@ -174,7 +191,10 @@ class PortfolioView(BaseView):
 			x1='end_index',
 			y0='rate',
 			y1='rate',
-			line_color='position_type_color',
+			line_color={
+			'field': 'direction',
+			'transform': self.direction_color_mapper,
+			},
 			line_alpha=0.7,
 			tags=['open_orders_glyph'],
 		)
@@ -182,7 +202,10 @@ class PortfolioView(BaseView):
 			x='close_index',
 			y='close_rate',
 			marker='circle',
-			fill_color='closing_color',
+			fill_color={
+			'field': 'profit_sign',
+			'transform': self.direction_color_mapper,
+			},
 			fill_alpha=0.5,
 			line_alpha=0,
 			tags=['closed_position_glyph'],
@@ -190,7 +213,10 @@ class PortfolioView(BaseView):
 		self._closed_positions_opening_glyph = models.Scatter(
 			x='open_index',
 			y='open_rate',
-			marker='marker',
+			marker={
+			'field': 'direction',
+			'transform': self.direction_marker_transform,
+			},
 			fill_color='gray',
 			tags=['closed_position_glyph'],
 			size=10,
@@ -200,7 +226,10 @@ class PortfolioView(BaseView):
 			y0='open_rate',
 			x1='close_index',
 			y1='close_rate',
-			line_color='closing_color',
+			line_color={
+			'field': 'profit_sign',
+			'transform': self.direction_color_mapper,
+			},
 			line_alpha=0.5,
 			tags=['closed_position_glyph'],
 		)
@@ -243,7 +272,10 @@ class PortfolioView(BaseView):
 		self._open_positions_glyph = models.Scatter(
 			x='index',
 			y='open_rate',
-			marker='marker',
+			marker={
+			'field': 'direction',
+			'transform': self.direction_marker_transform,
+			},
 			fill_color='turquoise',
 			size=10,
 			tags=['open_position_glyph'],
@@ -254,16 +286,37 @@ class PortfolioView(BaseView):
 			x1='index',
 			y1='low',
 			line_color='black',
+			tags=['ohlc_segment_wick_glyph'],
+		)
+		self._ohlc_wick_bar_glyph = models.VBar(
+			x='index',
+			top='high',
+			bottom='low',
+			fill_color='black',
+			line_color='black',
+			width=0.05,
+			tags=['ohlc_bar_wick_glyph'],
 		)
 		self._ohlc_bar_glyph = models.VBar(
 			x='index',
 			top='open',
 			bottom='close',
-			fill_color='color',
+			fill_color={
+			'field': 'direction',
+			'transform': self.direction_color_mapper,
+			},
 			line_color='black',
 			width=0.5,
 		)
 
+	@property
+	def direction_color_mapper(self):
+		return self._direction_color_mapper
+
+	@property
+	def direction_marker_transform(self):
+		return self._direction_marker_transform
+
 	@property
 	def country_exposure_chart(self):
 		return self._country_exposure_chart
@@ -316,6 +369,10 @@ class PortfolioView(BaseView):
 	def instrument_plot(self):
 		return self._instrument_plot
 
+	@property
+	def instrument_plot_row(self):
+		return self._instrument_plot_row
+
 	@property
 	def ohlc_bar_glyph(self):
 		return self._ohlc_bar_glyph
@@ -324,6 +381,14 @@ class PortfolioView(BaseView):
 	def ohlc_line_glyph(self):
 		return self._ohlc_line_glyph
 
+	@property
+	def ohlc_wick_bar_glyph(self):
+		return self._ohlc_wick_bar_glyph
+
+	@property
+	def webgl_bar_threshold(self):
+		return self._webgl_bar_threshold
+
 	@property
 	def open_positions_glyph(self):
 		return self._open_positions_glyph
@@ -406,6 +471,7 @@ class PortfolioModel(BaseModel):
 	def __init__(self, logger_name) -> None:
 		super().__init__(logger_name)
 		self._portfolio_overview = self.fetch_portfolio_overview()
+		self.bump_data_set_version('portfolio_overview')
 		self._instrument_granularities = {
 			'5m': '%Y-%m-%d %H:%M',
 			'1h': '%Y-%m-%d %H',
@@ -415,6 +481,7 @@ class PortfolioModel(BaseModel):
 		}
 
 		self._instrument_data = pandas.DataFrame()
+		self._instrument_time_index = numpy.array([], dtype='int64')
 		self._instrument_cds = plotting.ColumnDataSource(self._instrument_data)
 
 		self._open_positions_data_set = pandas.DataFrame()
@@ -460,6 +527,7 @@ class PortfolioModel(BaseModel):
 	@instrument_exposure_data_set.setter
 	def instrument_exposure_data_set(self, df: pandas.DataFrame):
 		self._instrument_exposure_data_set = df
+		self.bump_data_set_version('instrument_exposure_data_set')
 
 	@property
 	def country_exposure_cds(self) -> plotting.ColumnDataSource:
@@ -480,6 +548,7 @@ class PortfolioModel(BaseModel):
 	@country_exposure_data_set.setter
 	def country_exposure_data_set(self, df: pandas.DataFrame):
 		self._country_exposure_data_set = df
+		self.bump_data_set_version('country_exposure_data_set')
 
 	@property
 	def sector_exposure_cds(self) -> plotting.ColumnDataSource:
@@ -500,6 +569,7 @@ class PortfolioModel(BaseModel):
 	@sector_exposure_data_set.setter
 	def sector_exposure_data_set(self, df: pandas.DataFrame):
 		self._sector_exposure_data_set = df
+		self.bump_data_set_version('sector_exposure_data_set')
 
 	@property
 	def open_orders_data_set(self) -> pandas.DataFrame:
@@ -508,12 +578,9 @@ class PortfolioModel(BaseModel):
 	@open_orders_data_set.setter
 	def open_orders_data_set(self, df: pandas.DataFrame):
 		assert isinstance(df, pandas.DataFrame), 'Passed object is not a DF'
-		df['position_type_color'] = numpy.select(
-			[df['is_buy'] == 1, df['is_buy'] == 0],
-			['green', 'red'],
-		)
-
+		df['direction'] = numpy.where(df['is_buy'] == 1, 1, -1).astype('int8')
 		self._open_orders_data_set = df
+		self.bump_data_set_version('open_orders_data_set')
 
 	@property
 	def open_orders_data_view(self) -> pandas.DataFrame:
@@ -532,17 +599,12 @@ class PortfolioModel(BaseModel):
 		return self._closed_positions_data_set
 
 	@closed_positions_data_set.setter
-	def closed_positions_data_set(self, df: pandas.DataFrame):  #closing_color
+	def closed_positions_data_set(self, df: pandas.DataFrame):
 		assert isinstance(df, pandas.DataFrame), 'Passed object is not a DF'
-		df['marker'] = numpy.select(
-			[df['is_buy'] == 1, df['is_buy'] == 0],
-			['triangle', 'inverted_triangle'],
-		)
-		df['closing_color'] = numpy.select(
-			[df['net_profit'] > 0, df['net_profit'] < 0],
-			['green', 'red'],
-		)
+		df['direction'] = numpy.where(df['is_buy'] == 1, 1, -1).astype('int8')
+		df['profit_sign'] = numpy.sign(df['net_profit'].fillna(0)).astype('int8')
 		self._closed_positions_data_set = df
+		self.bump_data_set_version('closed_positions_data_set')
 
 	@property
 	def closed_positions_data_view(self) -> pandas.DataFrame:
@@ -563,12 +625,9 @@ class PortfolioModel(BaseModel):
 	@open_positions_data_set.setter
 	def open_positions_data_set(self, df: pandas.DataFrame):
 		assert isinstance(df, pandas.DataFrame), 'Passed object is not a DF'
-		df['marker'] = numpy.select(
-			[df['is_buy'] == 1, df['is_buy'] == 0],
-			['triangle', 'inverted_triangle'],
-		)
-
+		df['direction'] = numpy.where(df['is_buy'] == 1, 1, -1).astype('int8')
 		self._open_positions_data_set = df
+		self.bump_data_set_version('open_positions_data_set')
 
 	@property
 	def open_positions_data_view(self) -> pandas.DataFrame:
@@ -593,21 +652,34 @@ class PortfolioModel(BaseModel):
 	@instrument_data.setter
 	def instrument_data(self, df):
 		assert isinstance(df, pandas.DataFrame), 'Passed object is not a DF'
+		if not df['datetime'].is_monotonic_increasing:
+			df.sort_values(by='datetime', inplace=True, ignore_index=True)
 		df['change'] = (df['close'] - df['close'].shift(1)) / df['close'].shift(1) * 100
-		df['color'] = numpy.select([df['change'] > 0, df['change'] < 0], ['green', 'red'])
+		df['direction'] = numpy.sign(df['change'].fillna(0)).astype('int8')
 		df.reset_index(inplace=True)
 		self._instrument_data = df
+		self._instrument_time_index = df['datetime'].to_numpy(dtype='datetime64[ns]').view('int64')
+		self.bump_data_set_version('instrument_data')
+
+	@property
+	def instrument_time_index(self) -> numpy.ndarray:
+		return self._instrument_time_index
 
 	@property
 	def portfolio_overview(self) -> pandas.DataFrame:
 		return self._portfolio_overview
 
+	@portfolio_overview.setter
+	def portfolio_overview(self, df: pandas.DataFrame):
+		self._portfolio_overview = df
+		self.bump_data_set_version('portfolio_overview')
+
 	def portfolio_overview_etoro_symbols(self) -> List[str]:
 		return self.portfolio_overview['etoro_symbol_name'].values.tolist()
 
 	def common_symbol_lookup(self, etoro_symbol: str) -> str:
-		_df = self.portfolio_overview
-		return _df.loc[_df['etoro_symbol_name'] == etoro_symbol]['common_name'].values[0]
+		_df = self.filter_data_frame(data_set='portfolio_overview', column='etoro_symbol_name', value=etoro_symbol)
+		return _df['common_name'].values[0]
 
 	@property
 	def instrument_granularities(self) -> Dict[str, str]:
@@ -618,6 +690,7 @@ class PortfolioModel(BaseModel):
 
 
 class Portfolio(PortfolioView, PortfolioModel, BaseController):
+	panel_title = 'Portfolio'
 
 	def __init__(self) -> None:
 		super().__init__(
@@ -626,7 +699,8 @@ class Portfolio(PortfolioView, PortfolioModel, BaseController):
 			instrument_plot_height=720,
 			sector_table_height=360,
 			sector_table_width=640,
-			panel_title='Portfolio',
+			panel_title=self.panel_title,
+			webgl_bar_threshold=20000,
 		)
 
 		self.instrument_selector.options = self.portfolio_overview_etoro_symbols()
@@ -634,25 +708,108 @@ class Portfolio(PortfolioView, PortfolioModel, BaseController):
 		self.granularity_selector.options = self.instrument_granularities_list()
 		self.granularity_selector.value = self.granularity_selector.options[0]
 
+		self.append_callback(model=self.plot_calculation_button, function=self.load_instrument_data)
+		for _overlay in ['open_positions', 'closed_positions', 'open_orders']:
+			self.append_callback(model=self.plot_calculation_button, function=self.load_toggled_data_set, data_set=f'{_overlay}_data_set', fetch=f'fetch_portfolio_{_overlay}', toggle=f'{_overlay}_toggle') # Yapf:disable
 		self.append_callback(model=self.plot_calculation_button, function=self.update_instrument_plot)
 		self.append_callback(model=self.plot_calculation_button, function=self.update_view_range, x_min=180, x_max=5) # Yapf:disable
 		self.append_callback(model=self.plot_calculation_button, function=self.update_open_positions)
 		self.append_callback(model=self.plot_calculation_button, function=self.update_closed_positions)
 		self.append_callback(model=self.plot_calculation_button, function=self.update_open_orders)
+		self.append_callback(model=self.open_positions_toggle, function=self.load_data_set, data_set='open_positions_data_set', fetch='fetch_portfolio_open_positions') # Yapf:disable
 		self.append_callback(model=self.open_positions_toggle, function=self.update_open_positions)
+		self.append_callback(model=self.closed_positions_toggle, function=self.load_data_set, data_set='closed_positions_data_set', fetch='fetch_portfolio_closed_positions') # Yapf:disable
 		self.append_callback(model=self.closed_positions_toggle, function=self.update_closed_positions)
+		self.append_callback(model=self.open_orders_toggle, function=self.load_data_set, data_set='open_orders_data_set', fetch='fetch_portfolio_open_orders') # Yapf:disable
 		self.append_callback(model=self.open_orders_toggle, function=self.update_open_orders)
-		self.append_callback(model=self.instrument_plot, function=self.update_view_range, event_type=events.MouseWheel) # Yapf:disable
-		self.append_callback(model=self.positions_calculation_button, function=self.update_insights_tables) # Yapf:disable
-		self.append_callback(model=self.positions_scale_toggle, function=self.update_insights_tables) # Yapf:disable
+		for _aggregate in ['sector', 'instrument', 'country']:
+			self.append_callback(model=self.positions_calculation_button, function=self.load_data_set, data_set=f'{_aggregate}_exposure_data_set', fetch=f'fetch_{_aggregate}_exposure_data') # Yapf:disable
+		self.append_callback(model=self.positions_calculation_button, function=self.update_insights_tables)
+		self.link_exposure_scaling()
+		self.autoscale_y_range(
+			figure=self.instrument_plot,
+			source=self.instrument_cds,
+			low_fields=['low'],
+			high_fields=['high'],
+		)
 
+		# Keep portfolio data sets live, one server wide poller serves all sessions
+		_exposure_tables = ['dl_portfolio.etoro_positions', 'dl_portfolio.etoro_aggregated_mirrors', 'dl_portfolio.etoro_credit'] # Yapf:disable
+		for _data_set, _fetch, _tables, _function in [
+			('portfolio_overview', 'fetch_portfolio_overview', ['dl_portfolio.etoro_aggregated_positions'], self.update_instrument_options), # Yapf:disable
+			('open_positions_data_set', 'fetch_portfolio_open_positions', ['dl_portfolio.etoro_positions'], self.update_open_positions), # Yapf:disable
+			('open_orders_data_set', 'fetch_portfolio_open_orders', ['dl_portfolio.etoro_open_orders'], self.update_open_orders), # Yapf:disable
+			('sector_exposure_data_set', 'fetch_sector_exposure_data', _exposure_tables, self.update_insights_tables),
+			('instrument_exposure_data_set', 'fetch_instrument_exposure_data', _exposure_tables, self.update_insights_tables), # Yapf:disable
+			('country_exposure_data_set', 'fetch_country_exposure_data', _exposure_tables, self.update_insights_tables),
+		]:
+			LiveRefresh.shared().subscribe(subscriber=self, data_set=_data_set, fetch=_fetch, tables=_tables)
+			self.append_refresh_callback(data_set=_data_set, function=_function)
+
+	@BaseController.log_call
+	@BaseController.stage(data_inputs=['portfolio_overview'])
+	def update_instrument_options(self):
+		self.instrument_selector.options = self.portfolio_overview_etoro_symbols()
+		if self.instrument_selector.value not in self.instrument_selector.options:
+			self.instrument_selector.value = self.instrument_selector.options[0]
+
+	def link_exposure_scaling(self) -> models.CustomJS:
+		"""Switches exposure charts between raw and credit scaled exposure in the browser whenever
+		positions_scale_toggle flips. Exposure sources hold both series and x positions for both orderings,
+		so the callback only swaps glyph fields, axis labels, y range and hover tooltips.
+
+		Returns:
+			models.CustomJS: Attached callback
+		"""
+		callback = models.CustomJS(
+			args=dict(
+			charts=[
+			dict(
+			aggregate=_aggregate,
+			source=getattr(self, f'{_aggregate}_exposure_cds'),
+			glyph=getattr(self, f'{_aggregate}_exposure_vbar_glyph'),
+			axis=getattr(self, f'{_aggregate}_exposure_chart').xaxis[0],
+			y_range=getattr(self, f'{_aggregate}_exposure_chart').y_range,
+			hover_tool=getattr(self, f'{_aggregate}_exposure_hover_tool'),
+			) for _aggregate in ['sector', 'instrument', 'country']
+			],
+			),
+			code="""
+			const scaled = cb_obj.active
+			for (const {aggregate, source, glyph, axis, y_range, hover_tool} of charts) {
+				const x_field = scaled ? 'scaled_index' : 'index'
+				const top_field = scaled ? `scaled_${aggregate}_exposure` : `${aggregate}_exposure`
+				const xs = source.data[x_field]
+				const tops = source.data[top_field]
+				const labels = source.data[aggregate]
+				if (xs == null || tops == null || xs.length == 0)
+					continue
+
+				const overrides = new Map()
+				let start = Infinity, end = -Infinity
+				for (let i = 0; i < xs.length; i++) {
+					overrides.set(Number(xs[i]), String(labels[i]))
+					start = Math.min(start, tops[i])
+					end = Math.max(end, tops[i])
+				}
+				glyph.setv({x: {field: x_field}, top: {field: top_field}})
+				axis.major_label_overrides = overrides
+				y_range.setv({start: start, end: end})
+				hover_tool.tooltips = [[aggregate, `@${aggregate}`], ['Exposure', `@${top_field} %`]]
+			}
+			""",
+		)
+		self.positions_scale_toggle.js_on_change('active', callback)
+		return callback
 
 	@BaseController.log_call
+	@BaseController.stage(
+		data_inputs=['sector_exposure_data_set', 'instrument_exposure_data_set', 'country_exposure_data_set'],
+	)
 	def update_insights_tables(self):
 
 		def update_table(aggregate: str):
 			#Define variables
-			fetch_data_func = getattr(self, f'fetch_{aggregate}_exposure_data')
 			data_set_attr = f'{aggregate}_exposure_data_set'
 			data_view_attr = f'{aggregate}_exposure_data_view'
 			cds_attr = f'{aggregate}_exposure_cds'
@@ -660,23 +817,43 @@ class Portfolio(PortfolioView, PortfolioModel, BaseController):
 			glyph_attr = f'{aggregate}_exposure_vbar_glyph'
 			hover_tool_attr = f'{aggregate}_exposure_hover_tool'
 
-			if self.positions_scale_toggle.active:
-				column_name = f'scaled_{aggregate}_exposure'
-			else:
-				column_name = f'{aggregate}_exposure'
-
-			# Set data
-			data_set: pandas.DataFrame = getattr(self, data_set_attr)
-			if data_set.empty:
-				data_set = fetch_data_func()
-
-			data_view: pandas.DataFrame = getattr(self, data_view_attr)
-			data_view = data_set
-			data_view.sort_values(by=column_name, ascending=False, inplace=True, ignore_index=True)
-			data_view['index'] = data_view.reset_index().index
+			# Raw and scaled series both live in the source, the toggle switches between them in the browser
+			scaled = self.positions_scale_toggle.active
+			column_name = f'scaled_{aggregate}_exposure' if scaled else f'{aggregate}_exposure'
+			x_field = 'scaled_index' if scaled else 'index'
+
+			def build_view() -> Dict[str, Any]:
+				data_view = getattr(self, data_set_attr).sort_values(
+					by=f'{aggregate}_exposure',
+					ascending=False,
+					ignore_index=True,
+				)
+				data_view['index'] = data_view.index
+				data_view['scaled_index'] = pandas.Series(
+					range(len(data_view)),
+					index=data_view[f'scaled_{aggregate}_exposure'].sort_values(ascending=False, kind='stable').index,
+				)
+				factors = data_view[aggregate].unique().tolist()
+				return dict(
+					data_view=data_view,
+					color_mapper=models.CategoricalColorMapper(
+					factors=factors,
+					palette=numpy.array(palettes.Plasma256)[numpy.linspace(0, 255, len(factors), dtype=int)].tolist(),
+					),
+					label_overrides={
+					_field: dict(zip(data_view[_field].tolist(), data_view[aggregate].tolist()))
+					for _field in ['index', 'scaled_index']
+					},
+					ticker=models.FixedTicker(ticks=data_view['index'].tolist()),
+				)
+
+			# Set data, derived views and their models are reused until the data set changes
+			view = self.derived_view(data_set=data_set_attr, key=(), build=build_view)
+			data_view: pandas.DataFrame = view['data_view']
+			setattr(self, data_view_attr, data_view)
 
 			# Update data source
-			getattr(self, cds_attr).data.update(data_view)
+			self.sync_data_source(source=getattr(self, cds_attr), data=data_view)
 
 			# Update chart range
 			chart: plotting.Figure = getattr(self, chart_attr)
@@ -686,25 +863,18 @@ class Portfolio(PortfolioView, PortfolioModel, BaseController):
 			chart.y_range.end = data_view[column_name].max()
 
 			# Update chart glyphs and axis
-			color_mapper = models.CategoricalColorMapper(
-				factors=data_view[aggregate].unique().tolist(),
-				palette=numpy.array(palettes.Plasma256)\
-  [numpy.linspace(0, 255, len(data_view[aggregate].unique()),dtype=int)].tolist(),
-			)
-
 			vbar_glyph = getattr(self, glyph_attr)
 			vbar_glyph.top = column_name
 			vbar_glyph.bottom = 0
-			vbar_glyph.x = 'index'
+			vbar_glyph.x = x_field
 			vbar_glyph.fill_color = {
 				'field': aggregate,
-				'transform': color_mapper,
+				'transform': view['color_mapper'],
 			}
 
-			if len(chart.select({'id': vbar_glyph.id})) == 0:
-				chart.add_glyph(getattr(self, cds_attr), vbar_glyph)
-			chart.xaxis.major_label_overrides = data_view[aggregate].to_dict()
-			chart.xaxis.ticker = models.FixedTicker(ticks=data_view['index'].tolist())
+			self.attach_glyph(figure=chart, source=getattr(self, cds_attr), glyph=vbar_glyph)
+			chart.xaxis.major_label_overrides = view['label_overrides'][x_field]
+			chart.xaxis.ticker = view['ticker']
 
 			# Update hover tooltips
 			getattr(self, hover_tool_attr).tooltips = [
@@ -718,166 +888,209 @@ class Portfolio(PortfolioView, PortfolioModel, BaseController):
 		update_table(aggregate='country')
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['instrument_selector.value', 'granularity_selector.value'],
+		outputs=['instrument_data'],
+		offload=True,
+	)
+	def load_instrument_data(self) -> pandas.DataFrame:
+		return self.fetch_instrument_data(
+			instrument=self.common_symbol_lookup(self.instrument_selector.value),
+			granularity=self.granularity_selector.value,
+		)
+
+	@BaseController.log_call
+	@BaseController.stage(data_inputs=['instrument_data'])
 	def update_instrument_plot(self):
 		#Read state
 		granularity = self.granularity_selector.value
-		instrument = self.common_symbol_lookup(self.instrument_selector.value)
 
 		#Update model components
-		self.instrument_data = self.fetch_instrument_data(instrument=instrument, granularity=granularity)
-		self.instrument_cds.data.update(self.instrument_data)
+		self.sync_data_source(
+			source=self.instrument_cds,
+			data=self.to_cds_data(
+			df=self.instrument_data,
+			columns={
+			'index': 'int32',
+			'open': 'float32',
+			'high': 'float32',
+			'low': 'float32',
+			'close': 'float32',
+			'direction': 'int8',
+			},
+			),
+		)
 
 		#Update view components
-		if len(self.instrument_plot.select({'id': self.ohlc_line_glyph.id})) == 0:
-			self.instrument_plot.add_glyph(self.instrument_cds, self.ohlc_line_glyph)
-			self.instrument_plot.add_glyph(self.instrument_cds, self.ohlc_bar_glyph)
+		for _glyph in [self.ohlc_line_glyph, self.ohlc_wick_bar_glyph, self.ohlc_bar_glyph]:
+			self.attach_glyph(figure=self.instrument_plot, source=self.instrument_cds, glyph=_glyph)
+
+		# Large instruments are drawn with WebGL, which has no Segment implementation, so wicks become thin bars
+		_accelerate = len(self.instrument_data) >= self.webgl_bar_threshold
+		self.set_output_backend(
+			figure=self.instrument_plot,
+			parent=self.instrument_plot_row,
+			backend='webgl' if _accelerate else 'canvas',
+		)
+		self.toggle_renderers_based_on_tag(tags=['ohlc_segment_wick_glyph'], visible=not _accelerate)
+		self.toggle_renderers_based_on_tag(tags=['ohlc_bar_wick_glyph'], visible=_accelerate)
 
 		self.instrument_plot.xaxis.major_label_overrides = self.instrument_data['datetime'].dt.strftime(
 			self.instrument_granularities[granularity]
 		).to_dict()
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['instrument_selector.value'],
+		data_inputs=['instrument_data', 'open_positions_data_set'],
+		outputs=['open_positions_data_view'],
+	)
 	def update_open_positions(self):
-		if self.open_positions_toggle.active == True:
+		# Overlays are placed on the candles, before the first "Update plot" there are none to place them on
+		if self.instrument_data.empty:
+			return
+		# Synced to the instrument whenever loaded, so the toggle only has to show or hide the glyphs
+		if not self.open_positions_data_set.empty:
 			#Update model components
-			if self.open_positions_data_set.empty:
-				self.open_positions_data_set = self.fetch_portfolio_open_positions()
-
-			self.open_positions_data_view = self.open_positions_data_set
 			self.open_positions_data_view = self.filter_data_frame(
-				df=self.open_positions_data_view,
+				data_set='open_positions_data_set',
 				column='symbol_full',
 				value=self.instrument_selector.value,
 			)
-			self.open_positions_data_view = self.inherit_closest_index(
-				parent_df=self.instrument_data,
-				parent_on='datetime',
-				child_df=self.open_positions_data_view,
-				child_on='open_date_time',
+			self.open_positions_data_view = self.open_positions_data_view.assign(
+				index=self.closest_index(
+				time_index=self.instrument_time_index,
+				timestamps=self.open_positions_data_view['open_date_time'],
+				)
 			)
-			self.open_positions_cds.data.update(self.open_positions_data_view)
-
-			#Update view components
-			if len(self.instrument_plot.select({'id': self.open_positions_glyph.id})) == 0:
-				self.instrument_plot.add_glyph(self.open_positions_cds, self.open_positions_glyph)
-				self.instrument_plot.add_glyph(self.open_positions_cds, self.take_profit_hline_glyph)
-				self.instrument_plot.add_glyph(self.open_positions_cds, self.take_profit_vline_glyph)
-				self.instrument_plot.add_glyph(self.open_positions_cds, self.stop_loss_hline_glyph)
-				self.instrument_plot.add_glyph(self.open_positions_cds, self.stop_loss_vline_glyph)
-
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot,
-				tags=['open_position_glyph'],
-				visible=True,
-			)
-		else:
-			#Update view components
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot,
-				tags=['open_position_glyph'],
-				visible=False,
+			self.sync_data_source(
+				source=self.open_positions_cds,
+				data=self.to_cds_data(
+				df=self.open_positions_data_view,
+				columns={
+				'index': 'int32',
+				'open_rate': 'float32',
+				'stop_loss_rate': 'float32',
+				'take_profit_rate': 'float32',
+				'direction': 'int8',
+				},
+				),
 			)
 
+			#Update view components, afterwards the toggle shows and hides them in the browser
+			if not self.renderers_by_tag(tags=['open_position_glyph']):
+				for _glyph in [
+					self.open_positions_glyph,
+					self.take_profit_hline_glyph,
+					self.take_profit_vline_glyph,
+					self.stop_loss_hline_glyph,
+					self.stop_loss_vline_glyph,
+				]:
+					self.attach_glyph(figure=self.instrument_plot, source=self.open_positions_cds, glyph=_glyph)
+				self.link_renderers_visibility(toggle=self.open_positions_toggle, tags=['open_position_glyph'])
+				self.toggle_renderers_based_on_tag(tags=['open_position_glyph'], visible=self.open_positions_toggle.active)
+
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['instrument_selector.value'],
+		data_inputs=['instrument_data', 'closed_positions_data_set'],
+		outputs=['closed_positions_data_view'],
+	)
 	def update_closed_positions(self):
-		if self.closed_positions_toggle.active == True:
+		# Overlays are placed on the candles, before the first "Update plot" there are none to place them on
+		if self.instrument_data.empty:
+			return
+		# Synced to the instrument whenever loaded, so the toggle only has to show or hide the glyphs
+		if not self.closed_positions_data_set.empty:
 			#Update model components
-			if self.closed_positions_data_set.empty:
-				self.closed_positions_data_set = self.fetch_portfolio_closed_positions()
-
-			self.closed_positions_data_view = self.closed_positions_data_set
 			self.closed_positions_data_view = self.filter_data_frame(
-				df=self.closed_positions_data_view,
+				data_set='closed_positions_data_set',
 				column='symbol_full',
 				value=self.instrument_selector.value,
 			)
 
-			self.closed_positions_data_view = self.inherit_closest_index(
-				parent_df=self.instrument_data,
-				parent_on='datetime',
-				child_df=self.closed_positions_data_view,
-				child_on='close_date_time',
-			)
-			self.closed_positions_data_view = self.closed_positions_data_view.rename(
-				columns={'index': 'close_index'}
-			)
-
-			self.closed_positions_data_view = self.inherit_closest_index(
-				parent_df=self.instrument_data,
-				parent_on='datetime',
-				child_df=self.closed_positions_data_view,
-				child_on='open_date_time',
+			self.closed_positions_data_view = self.closed_positions_data_view.assign(
+				close_index=self.closest_index(
+				time_index=self.instrument_time_index,
+				timestamps=self.closed_positions_data_view['close_date_time'],
+				),
+				open_index=self.closest_index(
+				time_index=self.instrument_time_index,
+				timestamps=self.closed_positions_data_view['open_date_time'],
+				),
 			)
-			self.closed_positions_data_view = self.closed_positions_data_view.rename(
-				columns={'index': 'open_index'}
+			self.sync_data_source(
+				source=self.closed_positions_cds,
+				data=self.to_cds_data(
+				df=self.closed_positions_data_view,
+				columns={
+				'open_index': 'int32',
+				'close_index': 'int32',
+				'open_rate': 'float32',
+				'close_rate': 'float32',
+				'direction': 'int8',
+				'profit_sign': 'int8',
+				},
+				),
 			)
 
-			self.closed_positions_data_view = self.closed_positions_data_view.reset_index()
-			self.closed_positions_cds.data.update(self.closed_positions_data_view)
-
-			#Update view components
-			if len(self.instrument_plot.select({'id': self.closed_position_closing_glyph.id})) == 0:
-				self.instrument_plot.add_glyph(self.closed_positions_cds, self.closed_position_closing_glyph)
-				self.instrument_plot.add_glyph(self.closed_positions_cds, self.closed_positions_opening_glyph)
-				self.instrument_plot.add_glyph(self.closed_positions_cds, self.closed_position_connector_glyph)
-
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot, tags=['closed_position_glyph'], visible=True
-			)
-		else:
-			#Update view components
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot, tags=['closed_position_glyph'], visible=False
-			)
+			#Update view components, afterwards the toggle shows and hides them in the browser
+			if not self.renderers_by_tag(tags=['closed_position_glyph']):
+				for _glyph in [
+					self.closed_position_closing_glyph,
+					self.closed_positions_opening_glyph,
+					self.closed_position_connector_glyph,
+				]:
+					self.attach_glyph(figure=self.instrument_plot, source=self.closed_positions_cds, glyph=_glyph)
+				self.link_renderers_visibility(toggle=self.closed_positions_toggle, tags=['closed_position_glyph'])
+				self.toggle_renderers_based_on_tag(tags=['closed_position_glyph'], visible=self.closed_positions_toggle.active)
 
 	@BaseController.log_call
+	@BaseController.stage(
+		inputs=['instrument_selector.value'],
+		data_inputs=['instrument_data', 'open_orders_data_set'],
+		outputs=['open_orders_data_view'],
+	)
 	def update_open_orders(self):
-		if self.open_orders_toggle.active == True:
+		# Overlays are placed on the candles, before the first "Update plot" there are none to place them on
+		if self.instrument_data.empty:
+			return
+		# Synced to the instrument whenever loaded, so the toggle only has to show or hide the glyphs
+		if not self.open_orders_data_set.empty:
 			#Update model components
-			if self.open_orders_data_set.empty:
-				self.open_orders_data_set = self.fetch_portfolio_open_orders()
-
-			self.open_orders_data_view = self.open_orders_data_set
 			self.open_orders_data_view = self.filter_data_frame(
-				df=self.open_orders_data_view,
+				data_set='open_orders_data_set',
 				column='symbol_full',
 				value=self.instrument_selector.value,
 			)
 			self.open_orders_data_view = self.open_orders_data_view.reset_index()
 			self.open_orders_data_view['start_index'] = self.instrument_data.index.max()
 			self.open_orders_data_view['end_index'] = 99999
-			self.open_orders_cds.data.update(self.open_orders_data_view)
-
-			#Update view components
-			if len(self.instrument_plot.select({'id': self.open_orders_opening_glyph.id})) == 0:
-				self.instrument_plot.add_glyph(self.open_orders_cds, self.open_orders_opening_glyph)
-
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot, tags=['open_orders_glyph'], visible=True
-			)
-		else:
-			#Update view components
-			self.toggle_renderers_based_on_tag(
-				model=self.instrument_plot, tags=['open_orders_glyph'], visible=False
+			self.sync_data_source(
+				source=self.open_orders_cds,
+				data=self.to_cds_data(
+				df=self.open_orders_data_view,
+				columns={
+				'start_index': 'int32',
+				'end_index': 'int32',
+				'rate': 'float32',
+				'direction': 'int8',
+				},
+				),
 			)
 
+			#Update view components, afterwards the toggle shows and hides them in the browser
+			if not self.renderers_by_tag(tags=['open_orders_glyph']):
+				self.attach_glyph(figure=self.instrument_plot, source=self.open_orders_cds, glyph=self.open_orders_opening_glyph)
+				self.link_renderers_visibility(toggle=self.open_orders_toggle, tags=['open_orders_glyph'])
+				self.toggle_renderers_based_on_tag(tags=['open_orders_glyph'], visible=self.open_orders_toggle.active)
+
 	def update_view_range(self, x_min: int = None, x_max: int = None):
 
 		_df = self.instrument_data
 
-		#X-axis
+		#X-axis, y-axis follows in the browser through autoscale_y_range
 		if x_min:
-			_x_range_min = _df.index.max() - x_min
-			self.instrument_plot.x_range.start = _x_range_min
-		else:
-			_x_range_min = self.instrument_plot.x_range.start
+			self.instrument_plot.x_range.start = _df.index.max() - x_min
 		if x_max:
-			_x_range_max = _df.index.max() + x_max
-			self.instrument_plot.x_range.end = _x_range_max
-		else:
-			_x_range_max = self.instrument_plot.x_range.end
-
-		#Y-axis
-		_mask = (_df.index >= _x_range_min) & (_df.index <= _x_range_max)
-		self.instrument_plot.y_range.start = _df.loc[_mask]['low'].min()
-		self.instrument_plot.y_range.end = _df.loc[_mask]['high'].max()
+			self.instrument_plot.x_range.end = _df.index.max() + x_max
@@ -0,0 +1,258 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import random
+import threading
+import time
+
+# Attributes every span copies from its parent, so each span can be filtered by them on its own
+INHERITED_ATTRIBUTES = ('session.id', 'panel')
+
+
+class Span:
+	"""One timed operation of a trace. Times are unix epoch nanoseconds, as OpenTelemetry expects them."""
+	__slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes', 'start', 'end', 'error', 'sampled')
+
+	def __init__(
+		self,
+		name: str,
+		trace_id: str,
+		parent_id: Optional[str],
+		attributes: Dict[str, Any],
+		sampled: bool = True,
+	) -> None:
+		self.name = name
+		self.trace_id = trace_id
+		self.span_id = f'{random.getrandbits(64):016x}'
+		self.parent_id = parent_id
+		self.attributes: Dict[str, Any] = {}
+		self.start = time.time_ns()
+		self.end: Optional[int] = None
+		self.error: Optional[str] = None
+		self.sampled = sampled
+		self.set_attributes(**attributes)
+
+	@staticmethod
+	def attribute_value(value: Any) -> Any:
+		"""Converts value to a type OpenTelemetry accepts as attribute, other objects are kept as a shortened repr."""
+		if isinstance(value, (bool, int, float, str)):
+			return value
+		text = repr(value)
+		return text if len(text) <= 256 else f'{text[:253]}...'
+
+	def set_attributes(self, **attributes) -> None:
+		"""Sets attributes of span, None values are left out. No-op for spans not sampled."""
+		if not self.sampled:
+			return
+		for key, value in attributes.items():
+			if value is not None:
+				self.attributes[key] = self.attribute_value(value)
+
+	def to_otlp(self) -> Dict[str, Any]:
+		"""Converts span to its OTLP/JSON representation."""
+
+		def otlp_value(value: Any) -> Dict[str, Any]:
+			if isinstance(value, bool):
+				return {'boolValue': value}
+			if isinstance(value, int):
+				return {'intValue': str(value)}
+			if isinstance(value, float):
+				return {'doubleValue': value}
+			return {'stringValue': value}
+
+		span = {
+			'traceId': self.trace_id,
+			'spanId': self.span_id,
+			'name': self.name,
+			'kind': 1,
+			'startTimeUnixNano': str(self.start),
+			'endTimeUnixNano': str(self.end),
+			'attributes': [{'key': key, 'value': otlp_value(value)} for key, value in self.attributes.items()],
+			'status': {'code': 2, 'message': self.error} if self.error is not None else {},
+		}
+		if self.parent_id is not None:
+			span['parentSpanId'] = self.parent_id
+		return span
+
+
+# Handed out while tracing is off or the trace was not sampled, so callers never need to check
+_UNSAMPLED = Span(name='unsampled', trace_id='0' * 32, parent_id=None, attributes={}, sampled=False)
+
+
+class Tracer:
+	"""
+	Process wide tracer recording nested spans of callback chains, fetches and document updates.
+	Spans are only recorded while TRACE_FILE or TRACE_OPENTELEMETRY is set, otherwise every call is a cheap no-op.
+	A finished trace is appended to TRACE_FILE as one line of OTLP/JSON, the format OpenTelemetry collectors read.
+	With TRACE_OPENTELEMETRY set it is handed to the installed OpenTelemetry SDK as well, configured as usual
+	through the OTEL_* environment variables. TRACE_SAMPLE_RATIO keeps only that share of traces.
+	"""
+	_shared: 'Tracer' = None
+	_current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+	def __init__(self) -> None:
+		self.file = os.getenv('TRACE_FILE')
+		self.sample_ratio = float(os.getenv('TRACE_SAMPLE_RATIO', '1'))
+		self._opentelemetry = None
+		if os.getenv('TRACE_OPENTELEMETRY'):
+			from opentelemetry import trace
+			self._opentelemetry = trace
+		self.enabled = bool(self.file) or self._opentelemetry is not None
+		self._lock = threading.Lock()
+		# Finished spans per trace, until the root span of the trace ends
+		self._traces: Dict[str, List[Span]] = {}
+
+	@classmethod
+	def shared(cls) -> 'Tracer':
+		if cls._shared is None:
+			cls._shared = cls()
+		return cls._shared
+
+	@property
+	def current_span(self) -> Optional[Span]:
+		return self._current.get()
+
+	def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+		"""Starts a span, which has to be ended through end_span. Use span instead where the operation is one block.
+
+		Args:
+			name (str): Name of the operation
+			parent (Optional[Span]): Parent span. Defaults to the current span, a new trace is started without one.
+
+		Optional:
+		 **attributes of the span.
+
+		Returns:
+			Span:
+		"""
+		parent = parent or self._current.get()
+		if not self.enabled or (parent is not None and not parent.sampled):
+			return _UNSAMPLED
+
+		if parent is None:
+			if self.sample_ratio < 1 and random.random() >= self.sample_ratio:
+				return _UNSAMPLED
+			span = Span(name=name, trace_id=f'{random.getrandbits(128):032x}', parent_id=None, attributes=attributes)
+			with self._lock:
+				self._traces[span.trace_id] = []
+			return span
+
+		inherited = {key: parent.attributes[key] for key in INHERITED_ATTRIBUTES if key in parent.attributes}
+		return Span(name=name, trace_id=parent.trace_id, parent_id=parent.span_id, attributes={**inherited, **attributes})
+
+	def end_span(self, span: Span, error: Optional[BaseException] = None, **attributes) -> None:
+		"""Ends span, exporting its trace once it is the root span.
+
+		Args:
+			span (Span): Span to end
+			error (Optional[BaseException]): Exception the operation failed with. Defaults to None.
+
+		Optional:
+		 **attributes to set on the span before it ends.
+		"""
+		if not span.sampled:
+			return
+		span.set_attributes(**attributes)
+		span.end = time.time_ns()
+		if error is not None:
+			span.error = repr(error)
+
+		with self._lock:
+			spans = self._traces.get(span.trace_id)
+			if spans is None:
+				return
+			spans.append(span)
+			if span.parent_id is not None:
+				return
+			del self._traces[span.trace_id]
+		self.export(spans)
+
+	@contextmanager
+	def activate(self, span: Span):
+		"""Makes span the current span within the block, the parent of spans started in it."""
+		token = self._current.set(span)
+		try:
+			yield span
+		finally:
+			self._current.reset(token)
+
+	@contextmanager
+	def span(self, name: str, parent: Optional[Span] = None, **attributes):
+		"""Records the block as a span, which is current within it.
+
+		Args:
+			name (str): Name of the operation
+			parent (Optional[Span]): Parent span. Defaults to the current span.
+
+		Optional:
+		 **attributes of the span.
+		"""
+		span = self.start_span(name, parent=parent, **attributes)
+		token = self._current.set(span)
+		try:
+			yield span
+		except BaseException as e:
+			self.end_span(span, error=e)
+			raise
+		else:
+			self.end_span(span)
+		finally:
+			self._current.reset(token)
+
+	def wrap(self, function: Callable, name: str, **attributes) -> Callable:
+		"""Wraps function to run in a span that is a child of the span current at wrapping,
+		so that work handed to another thread stays part of the trace it was started from.
+
+		Args:
+			function (Callable): Function to wrap
+			name (str): Name of the span
+
+		Optional:
+		 **attributes of the span.
+
+		Returns:
+			Callable:
+		"""
+		parent = self._current.get()
+		if parent is None or not parent.sampled:
+			return function
+
+		def traced(*args, **kwargs):
+			with self.span(name, parent=parent, **attributes):
+				return function(*args, **kwargs)
+
+		return traced
+
+	def export(self, spans: List[Span]) -> None:
+		"""Writes the spans of a finished trace to the configured exporters."""
+		if self.file:
+			line = json.dumps({
+				'resourceSpans': [{
+					'resource': {
+						'attributes': [{'key': 'service.name', 'value': {'stringValue': 'investing-dashboard'}}]
+					},
+					'scopeSpans': [{'scope': {'name': __name__}, 'spans': [_span.to_otlp() for _span in spans]}],
+				}]
+			})
+			with self._lock:
+				with open(self.file, 'a') as _file:
+					_file.write(line + '\n')
+
+		if self._opentelemetry is not None:
+			trace = self._opentelemetry
+			tracer = trace.get_tracer(__name__)
+			started = {}
+			for span in sorted(spans, key=lambda _span: _span.start):
+				parent = started.get(span.parent_id)
+				started[span.span_id] = tracer.start_span(
+					span.name,
+					context=trace.set_span_in_context(parent) if parent is not None else None,
+					attributes=span.attributes,
+					start_time=span.start,
+				)
+				if span.error is not None:
+					started[span.span_id].set_status(trace.Status(trace.StatusCode.ERROR, span.error))
+			for span in spans:
+				started[span.span_id].end(end_time=span.end)